@@ -0,0 +1,27 @@
+"""
+Builds the Overview page's headline numbers (storm totals, conversion rate, class counts,
+severity shift) once from the processed storm tables, so the dashboard just reads a small json
+instead of recomputing them on every rerun.
+run from the repo root (after the storm tables change): python "cleaning scripts/build_overview_kpis.py"
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from core.constants import LANDFALL_V4_STORMS, PAR_V3_STORMS  # noqa: E402
+from core.kpis import OVERVIEW_KPIS_PATH, compute_overview_kpis, source_signatures  # noqa: E402
+
+
+if __name__ == "__main__":
+    kpis = compute_overview_kpis(pd.read_parquet(PAR_V3_STORMS), pd.read_parquet(LANDFALL_V4_STORMS))
+    # hashes of the tables it was built from, so the dashboard can tell when the json is stale
+    kpis["sources"] = source_signatures((PAR_V3_STORMS, LANDFALL_V4_STORMS))
+
+    OVERVIEW_KPIS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OVERVIEW_KPIS_PATH.write_text(json.dumps(kpis, indent=2) + "\n", encoding="utf-8")
+
+    print(f"Saved overview KPIs to {OVERVIEW_KPIS_PATH}")
+    print(kpis)
@@ -1,37 +1,24 @@
 import json
-import pandas as pd
 import numpy as np
+import pandas as pd
 from pathlib import Path
-from matplotlib.path import Path as MplPath
 
-RAW_CSV_PATH = Path("data/raw/IBTrACS/ibtracs_wp_full.csv.gz")
+from ibtracs_common import WIND_COLUMN, drop_track_duplicates, export_table, label_intensity, load_and_clean, sid_mask, sort_storms
+from point_in_polygon import pip_any_ring
+
 PH_GEOJSON_PATH = Path("data/raw/boundaries/philippines.geojson")
 
 OUT_TRACKS_PATH = Path("data/processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_tracks.csv")
 OUT_STORMS_PATH = Path("data/processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_storms.csv")
 
-START_YEAR = 1950
-END_YEAR = 2023
-
-WIND_COLUMN = "USA_WIND"
 KEEP_NATURE = {"TD", "TS", "TY"}  # optional filter set for later use
 
-USE_COLUMNS = ["SID", "ISO_TIME", "LAT", "LON", "NATURE", WIND_COLUMN]
-
-#load PH GeoJSON -> list[Path]
-def _ensure_lon_180(lon: float) -> float:
-    """
-    IBTrACS sometimes stores lon in 0..360. PH GeoJSON is usually -180..180.
-    convert anything > 180 into the -180..180 range.
+#load PH GeoJSON -> flat ring buffers
+def load_geojson_rings(geojson_path: Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    if lon > 180:
-        return lon - 360
-    return lon
-
-
-def load_geojson_paths(geojson_path: Path) -> list[MplPath]:
-    """
-    Load a GeoJSON (Polygon or MultiPolygon) and return a list of matplotlib Paths.
+    Load a GeoJSON (Polygon or MultiPolygon) into one (n_verts, 2) float64 vertex array,
+    an (n_rings + 1,) offsets array (ring r is verts[offsets[r]:offsets[r + 1]]) and an
+    (n_rings, 4) array of ring bounding boxes (minx, miny, maxx, maxy).
     Notes:
     - We only use the EXTERIOR ring for a minimal landfall test.
     - This ignores holes; usually fine for "hit land somewhere in PH" logic.
@@ -55,7 +42,7 @@ def load_geojson_paths(geojson_path: Path) -> list[MplPath]:
     if not geom or "type" not in geom:
         raise ValueError("Could not parse geometry from GeoJSON.")
 
-    paths: list[MplPath] = []
+    rings: list[np.ndarray] = []
 
     gtype = geom["type"]
     coords = geom["coordinates"]
@@ -64,8 +51,7 @@ def load_geojson_paths(geojson_path: Path) -> list[MplPath]:
         # poly_coords: [ exterior_ring, hole1, hole2, ... ]
         exterior = poly_coords[0]
         # exterior is list of [lon, lat]
-        verts = [(float(x), float(y)) for x, y in exterior]
-        paths.append(MplPath(verts))
+        rings.append(np.asarray(exterior, dtype=np.float64)[:, :2])
 
     if gtype == "Polygon":
         add_polygon(coords)
@@ -75,128 +61,112 @@ def load_geojson_paths(geojson_path: Path) -> list[MplPath]:
     else:
         raise ValueError(f"Unsupported geometry type: {gtype}. Expected Polygon or MultiPolygon.")
 
-    if not paths:
+    if not rings:
         raise ValueError("No polygons extracted from the PH GeoJSON.")
 
-    return paths
-
-
-def points_in_any_polygon(lons: np.ndarray, lats: np.ndarray, paths: list[MplPath]) -> np.ndarray:
+    verts = np.concatenate(rings)
+    offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rings])
+    bboxes = np.array([[*r.min(axis=0), *r.max(axis=0)] for r in rings])
+    return verts, offsets, bboxes
+
+
+def emit_landfall(
+    df: pd.DataFrame,
+    verts: np.ndarray,
+    offsets: np.ndarray,
+    bboxes: np.ndarray,
+    out_tracks_path: Path = OUT_TRACKS_PATH,
+    out_storms_path: Path = OUT_STORMS_PATH,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
-    vectorised-ish check: a point is on PH land if it falls inside ANY polygon path.
+    Landfall variant on an already-cleaned frame: PH land test, track + storm tables, exports.
     """
-    pts = np.column_stack([lons, lats])
-    hit = np.zeros(len(pts), dtype=bool)
-    for p in paths:
-        # contains_points returns a boolean array per path
-        hit |= p.contains_points(pts)
-    return hit
-
-# basic checks
-
-if not RAW_CSV_PATH.exists():
-    raise FileNotFoundError(f"Could not find input CSV at: {RAW_CSV_PATH}")
-
-header_columns = pd.read_csv(RAW_CSV_PATH, nrows=0).columns.tolist()
-missing_columns = [col for col in USE_COLUMNS if col not in header_columns]
-if missing_columns:
-    raise KeyError(
-        f"Missing required columns: {missing_columns}\n"
-        f"Available columns include: {header_columns[:30]} ... (total {len(header_columns)})"
+    # Make lon consistent with PH GeoJSON
+    # IBTrACS sometimes stores lon in 0..360, PH GeoJSON is -180..180 -> shift anything > 180 down
+    # (assign gives a new frame, so the caller's df is left untouched)
+    lon = df["LON"].to_numpy()
+    df = df.assign(LON_180=np.where(lon > 180, lon - 360, lon))
+
+    # Landfall detection: point-in-PH-land polygons
+    df["on_ph_land"] = pip_any_ring(
+        df["LON_180"].to_numpy(),
+        df["LAT"].to_numpy(),
+        verts,
+        offsets,
+        bboxes,
     )
 
-# Load PH land polygon paths
-ph_paths = load_geojson_paths(PH_GEOJSON_PATH)
-
-# Load + coerce
-df = pd.read_csv(RAW_CSV_PATH, usecols=USE_COLUMNS, low_memory=False)
-
-df["ISO_TIME"] = pd.to_datetime(df["ISO_TIME"], errors="coerce")
-df["LAT"] = pd.to_numeric(df["LAT"], errors="coerce")
-df["LON"] = pd.to_numeric(df["LON"], errors="coerce")
-df[WIND_COLUMN] = pd.to_numeric(df[WIND_COLUMN], errors="coerce")
-
-df = df.dropna(subset=["SID", "ISO_TIME", "LAT", "LON", WIND_COLUMN])
-
-df["year"] = df["ISO_TIME"].dt.year
-df = df[(df["year"] >= START_YEAR) & (df["year"] <= END_YEAR)].copy()
-
-# Make lon consistent with PH GeoJSON
-df["LON_180"] = df["LON"].map(_ensure_lon_180)
-
-# Landfall detection: point-in-PH-land polygons
-df["on_ph_land"] = points_in_any_polygon(
-    df["LON_180"].to_numpy(),
-    df["LAT"].to_numpy(),
-    ph_paths
-)
-
-# Storms that made PH landfall (at least one point on land)
-landfall_storm_ids = df.loc[df["on_ph_land"], "SID"].unique()
-if len(landfall_storm_ids) == 0:
-    print("Warning: No storms intersect PH land after filtering. Output files will be empty.")
-
-# Keep full track history for landfall storms
-tracks_df = df[df["SID"].isin(landfall_storm_ids)].copy()
-
-# Light dedupe + sort
-tracks_df = tracks_df.drop_duplicates(subset=["SID", "ISO_TIME", "LAT", "LON_180"])
-tracks_df = tracks_df.sort_values(["SID", "ISO_TIME"]).reset_index(drop=True)
-
-# First landfall moment per storm
-lf_first = (
-    tracks_df[tracks_df["on_ph_land"]]
-    .sort_values(["SID", "ISO_TIME"])
-    .groupby("SID", as_index=False)
-    .first()[["SID", "ISO_TIME", "LAT", "LON_180", WIND_COLUMN, "NATURE"]]
-    .rename(columns={
-        "ISO_TIME": "first_landfall_time",
-        "LAT": "first_landfall_lat",
-        "LON_180": "first_landfall_lon",
-        WIND_COLUMN: "first_landfall_wind",
-        "NATURE": "first_landfall_nature",
-    })
-)
-
-# Storm-level summary
-storms_df = (
-    tracks_df
-    .groupby("SID", as_index=False)
-    .agg(
-        start_time=("ISO_TIME", "min"),
-        end_time=("ISO_TIME", "max"),
-        start_year=("year", "min"),
-        max_wind=(WIND_COLUMN, "max"),         # lifetime max (for storms that landfell)
-        n_track_points=("ISO_TIME", "count"),
-        mean_lat=("LAT", "mean"),
-        mean_lon=("LON_180", "mean"),
-        any_landfall=("on_ph_land", "max"),    # should be True for all kept storms
+    # Storms that made PH landfall (at least one point on land)
+    # (unique over the int category codes, then back to SID labels)
+    landfall_storm_ids = df["SID"].cat.categories[pd.unique(df["SID"].cat.codes.to_numpy()[df["on_ph_land"].to_numpy()])]
+    if len(landfall_storm_ids) == 0:
+        print("Warning: No storms intersect PH land after filtering. Output files will be empty.")
+
+    # Keep full track history for landfall storms
+    tracks_df = df[sid_mask(df["SID"], landfall_storm_ids)]
+
+    # Light dedupe + sort
+    tracks_df = drop_track_duplicates(tracks_df, lon_column="LON_180")
+    tracks_df = tracks_df.sort_values(["SID", "ISO_TIME"]).reset_index(drop=True)
+
+    # First landfall moment per storm
+    # tracks_df is already in (SID, ISO_TIME) order, so no re-sort: one groupby over the on-land rows.
+    # first() rather than drop_duplicates on purpose - it takes each column's first non-null value,
+    # so a first landfall row without a wind still gets the wind of the next landfall row
+    lf_first = (
+        tracks_df.loc[tracks_df["on_ph_land"], ["SID", "ISO_TIME", "LAT", "LON_180", WIND_COLUMN, "NATURE"]]
+        .groupby("SID", as_index=False, observed=True, sort=False)
+        .first()
+        .rename(columns={
+            "ISO_TIME": "first_landfall_time",
+            "LAT": "first_landfall_lat",
+            "LON_180": "first_landfall_lon",
+            WIND_COLUMN: "first_landfall_wind",
+            "NATURE": "first_landfall_nature",
+        })
     )
-    .merge(lf_first, on="SID", how="left")
-    .sort_values(["start_year", "SID"])
-    .reset_index(drop=True)
-)
-
-# Intensity label (JTWC-style thresholds in knots)
-storms_df["peak_intensity"] = "TD"
-storms_df.loc[storms_df["max_wind"] >= 34, "peak_intensity"] = "TS"
-storms_df.loc[storms_df["max_wind"] >= 64, "peak_intensity"] = "TY"
-storms_df.loc[storms_df["max_wind"] >= 130, "peak_intensity"] = "STY"
-
-# landfall intensity label, based on wind at first landfall point
-storms_df["landfall_intensity"] = np.nan
-storms_df["landfall_intensity"] = "TD"
-storms_df.loc[storms_df["first_landfall_wind"] >= 34, "landfall_intensity"] = "TS"
-storms_df.loc[storms_df["first_landfall_wind"] >= 64, "landfall_intensity"] = "TY"
-storms_df.loc[storms_df["first_landfall_wind"] >= 130, "landfall_intensity"] = "STY"
-
-# exports
-OUT_TRACKS_PATH.parent.mkdir(parents=True, exist_ok=True)
-tracks_df.to_csv(OUT_TRACKS_PATH, index=False)
-storms_df.to_csv(OUT_STORMS_PATH, index=False)
-
-print(f"Saved tracks CSV to: {OUT_TRACKS_PATH}")
-print(f"Saved storms CSV to: {OUT_STORMS_PATH}")
-print("Tracks rows:", len(tracks_df), "| Storms:", storms_df["SID"].nunique())
-print("\nLandfall intensity counts (first landfall point):")
-print(storms_df["landfall_intensity"].value_counts(dropna=False).to_dict())
+
+    # Storm-level summary
+    storms_df = (
+        tracks_df
+        .groupby("SID", as_index=False, observed=True, sort=False)  # sort_storms orders it below
+        .agg(
+            start_time=("ISO_TIME", "min"),
+            end_time=("ISO_TIME", "max"),
+            start_year=("year", "min"),
+            max_wind=(WIND_COLUMN, "max"),         # lifetime max (for storms that landfell)
+            n_track_points=("ISO_TIME", "count"),
+            mean_lat=("LAT", "mean"),
+            mean_lon=("LON_180", "mean"),
+            any_landfall=("on_ph_land", "max"),    # should be True for all kept storms
+        )
+        .merge(lf_first, on="SID", how="left")
+        .pipe(sort_storms)
+    )
+
+    # Intensity label (JTWC-style thresholds in knots)
+    storms_df["peak_intensity"] = label_intensity(storms_df["max_wind"])
+
+    # landfall intensity label, based on wind at first landfall point
+    storms_df["landfall_intensity"] = label_intensity(storms_df["first_landfall_wind"])
+
+    # exports
+    export_table(tracks_df, out_tracks_path)
+    export_table(storms_df, out_storms_path)
+
+    print(f"Saved tracks CSV to: {out_tracks_path}")
+    print(f"Saved storms CSV to: {out_storms_path}")
+    print("Tracks rows:", len(tracks_df), "| Storms:", storms_df["SID"].nunique())
+    print("\nLandfall intensity counts (first landfall point):")
+    print(storms_df["landfall_intensity"].value_counts(dropna=False).to_dict())
+
+    return tracks_df, storms_df
+
+
+if __name__ == "__main__":
+    # Load PH land polygon rings
+    ph_verts, ph_offsets, ph_bboxes = load_geojson_rings(PH_GEOJSON_PATH)
+
+    # read + dropna + categories + year window (cached as parquet after the first run)
+    emit_landfall(load_and_clean(), ph_verts, ph_offsets, ph_bboxes)
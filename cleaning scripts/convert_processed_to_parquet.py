@@ -0,0 +1,23 @@
+"""
+One-shot migration: rewrite every processed CSV under data/processed as a parquet file next to it.
+The dashboard loads the parquet copies (columnar + typed, no csv tokenising on cold start).
+New outputs from the cleaning scripts already get a parquet copy, so this is only for the existing files.
+run from the repo root: python "cleaning scripts/convert_processed_to_parquet.py"
+"""
+import pyarrow as pa
+import pyarrow.csv as pac
+import pyarrow.parquet as pq
+from pathlib import Path
+
+PROCESSED_DIR = Path("data/processed")
+
+# years are int32 in the cleaning scripts' outputs too, so the dashboard never casts them
+# (true/false columns like on_ph_land / any_landfall already come in as bool)
+COLUMN_TYPES = {"year": pa.int32(), "start_year": pa.int32()}
+
+for csv_path in sorted(PROCESSED_DIR.rglob("*.csv")):
+    # empty fields -> nulls (like pandas), ISO timestamps get typed on the way in
+    table = pac.read_csv(csv_path, convert_options=pac.ConvertOptions(column_types=COLUMN_TYPES, strings_can_be_null=True))
+    parquet_path = csv_path.with_suffix(".parquet")
+    pq.write_table(table, parquet_path, compression="zstd")
+    print(f"{csv_path} -> {parquet_path} ({csv_path.stat().st_size:,} -> {parquet_path.stat().st_size:,} bytes)")
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# copy-on-write: filtered frames share memory until written to, so no defensive .copy() needed
+# (already the default from pandas 3, where the option is deprecated)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# raw IBTrACS as written by data/raw/IBTrACS/make_gzip_ibtracs.py (typed zstd parquet);
+# the older gzip csv copy is still read if that's all there is
+RAW_PARQUET_PATH = Path("data/raw/IBTrACS/ibtracs_full.parquet")
+RAW_CSV_PATH = Path("data/raw/IBTrACS/ibtracs_wp_full.csv.gz")
+
+# cleaned raw tracks get cached here so re-runs skip the gzip + csv parse
+INTERIM_DIR = Path("data/interim")
+
+# because our dataset from era5 is also 1950-2023
+START_YEAR = 1950
+END_YEAR = 2023
+
+WIND_COLUMN = "USA_WIND" # one wind standard for consistency i reckon
+
+# minimal for now probably (add more later if needed)
+USE_COLUMNS = ["SID", "ISO_TIME", "LAT", "LON", "NATURE", WIND_COLUMN]
+
+# outputs always go out as parquet, csv copies are optional
+WRITE_CSV = True
+
+# "arrow" (default, pyarrow ships with pandas/streamlit anyway) or "polars" (optional, pip install polars)
+READ_BACKEND = "arrow"
+
+# Joint Typhoon Warning Center (JTWC) wind thresholds in knots, lower bound of each class
+INTENSITY_THRESHOLDS = np.array([0, 34, 64, 130])
+INTENSITY_LABELS = np.array(["TD", "TS", "TY", "STY"], dtype=object)
+
+
+def _read_header(raw_path: Path) -> list[str]:
+    # basic checks (required columns), returns the file's column order
+    if raw_path.suffix == ".parquet":
+        header_columns = pq.read_schema(raw_path).names
+    else:
+        header_columns = pd.read_csv(raw_path, nrows=0).columns.tolist()
+    missing_columns = [col for col in USE_COLUMNS if col not in header_columns]
+    if missing_columns:
+        raise KeyError(
+            f"Missing required columns: {missing_columns}\n"
+            f"Available columns include: {header_columns[:30]} ... (total {len(header_columns)})"
+        )
+    return header_columns
+
+
+def _read_raw_csv(raw_path: Path) -> pd.DataFrame:
+    header_columns = _read_header(raw_path)
+
+    # pyarrow parses the gzip csv multithreaded + types columns as it reads
+    # IBTrACS has a units row straight after the header and uses " " for missing values
+    read_options = pac.ReadOptions(use_threads=True, block_size=8 << 20, skip_rows_after_names=1)
+    convert_options = pac.ConvertOptions(
+        include_columns=[col for col in header_columns if col in USE_COLUMNS],  # keep file column order
+        column_types={"ISO_TIME": pa.timestamp("ns")},
+        null_values=["", " "],
+        strings_can_be_null=True,
+    )
+    dataframe = pac.read_csv(raw_path, read_options=read_options, convert_options=convert_options).to_pandas()
+    return _coerce_numeric(dataframe)
+
+
+def _read_raw_parquet(raw_path: Path) -> pd.DataFrame:
+    # the converter's parquet is already typed, so this is just the column pick + one handoff
+    # (ns timestamps like the csv read, the converter stores whole seconds)
+    header_columns = _read_header(raw_path)
+    table = pq.read_table(raw_path, columns=[col for col in header_columns if col in USE_COLUMNS])
+    i = table.column_names.index("ISO_TIME")
+    table = table.set_column(i, "ISO_TIME", table.column(i).cast(pa.timestamp("ns")))
+    # dictionary columns (NATURE) decoded back to plain strings, otherwise the later category cast
+    # would keep every code in the file's dictionaries, not just the ones that survive the filters
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return _coerce_numeric(table.to_pandas())
+
+
+def _coerce_numeric(dataframe: pd.DataFrame) -> pd.DataFrame:
+    # arrow already infers a numeric type when every cell parses (the usual case), so only a column
+    # that came back as strings (stray junk somewhere) goes through the slow coercing parser
+    # LAT/LON stay float64: the PAR vertices are whole degrees, so plenty of points sit exactly on the
+    # diagonal edge and their float32 values land on the other side of it (in_par flips).
+    # the wind is only thresholded in 5 kt steps, float32 is plenty there and half the memory
+    for col in ("LAT", "LON", WIND_COLUMN):
+        values = dataframe[col]
+        if not np.issubdtype(values.dtype, np.floating):
+            values = pd.to_numeric(values, errors="coerce")
+        dataframe[col] = values.astype(np.float32 if col == WIND_COLUMN else np.float64)
+    return dataframe
+
+
+def _read_and_filter_polars(raw_path: Path) -> pd.DataFrame:
+    # same read + dropna + year window as the arrow path, but as one polars lazy query
+    # (multithreaded scan/filter in rust, only the surviving rows get converted to pandas)
+    import polars as pl
+
+    header_columns = _read_header(raw_path)
+
+    lf = (
+        pl.scan_csv(
+            raw_path,
+            skip_rows_after_header=1,  # IBTrACS units row
+            null_values=["", " "],
+            schema_overrides={
+                "ISO_TIME": pl.Datetime("ns"),
+                # float64 coords, same as the arrow path (float32 moves PAR edge points across it)
+                "LAT": pl.Float64,
+                "LON": pl.Float64,
+                WIND_COLUMN: pl.Float32,
+            },
+            infer_schema=False,  # everything else stays a string, we only touch USE_COLUMNS
+            ignore_errors=True,  # junk numeric cells -> null, like to_numeric(errors="coerce")
+        )
+        .select([col for col in header_columns if col in USE_COLUMNS])  # keep file column order
+        .drop_nulls(subset=["SID", "ISO_TIME", "LAT", "LON", WIND_COLUMN])
+        .with_columns(pl.col("ISO_TIME").dt.year().cast(pl.Int32).alias("year"))
+        .filter(pl.col("year").is_between(START_YEAR, END_YEAR))
+    )
+    return lf.collect().to_pandas()
+
+
+def load_and_clean(raw_path: Path | None = None) -> pd.DataFrame:
+    """
+    Shared prelude for every IBTrACS cleaning script: read, drop uninterpretable rows,
+    categorise SID/NATURE and keep START_YEAR..END_YEAR.
+    raw_path defaults to the raw parquet (RAW_PARQUET_PATH), or the gzip csv if only that exists.
+    The result is cached as parquet keyed on the raw file's mtime (and the year window),
+    so only the first run after the raw file changes pays for the raw read.
+    """
+    if raw_path is None:
+        raw_path = RAW_CSV_PATH if not RAW_PARQUET_PATH.exists() and RAW_CSV_PATH.exists() else RAW_PARQUET_PATH
+    if not raw_path.exists():
+        raise FileNotFoundError(f"Could not find raw IBTrACS file at: {raw_path}")
+
+    stat = raw_path.stat()
+    # (the f64 tag keeps caches written back when LAT/LON were float32 from being picked up)
+    cache_path = INTERIM_DIR / f"ibtracs_{stat.st_mtime_ns}_{START_YEAR}_{END_YEAR}_f64.parquet"
+    if cache_path.exists():
+        return pd.read_parquet(cache_path)
+
+    # (the polars backend is a csv scan; the parquet is typed already, so it always goes through arrow)
+    if READ_BACKEND == "polars" and raw_path.suffix != ".parquet":
+        dataframe = _read_and_filter_polars(raw_path)
+    else:
+        dataframe = _read_raw_parquet(raw_path) if raw_path.suffix == ".parquet" else _read_raw_csv(raw_path)
+
+        # drop rows we can't interpret safely (i.e. if anything has invalid value in any of these columns we drop the row)
+        dataframe = dataframe.dropna(subset=["SID", "ISO_TIME", "LAT", "LON", WIND_COLUMN])
+
+        # add year column for filtering + aggregation
+        # ISO_TIME is already timestamp-typed from the arrow read (no to_datetime pass), and
+        # flooring the raw datetime64 buffer to years is cheaper than the .dt.year accessor
+        # (int32 so the exported tables carry int32 years and the dashboard never has to cast them)
+        dataframe["year"] = dataframe["ISO_TIME"].to_numpy().astype("datetime64[Y]").astype(np.int32) + 1970
+        dataframe = dataframe[(dataframe["year"] >= START_YEAR) & (dataframe["year"] <= END_YEAR)].reset_index(drop=True)
+
+    # SID + NATURE repeat a lot, as categories groupby/isin work on int codes instead of hashing strings
+    dataframe["SID"] = dataframe["SID"].astype("category")
+    dataframe["NATURE"] = dataframe["NATURE"].astype("category")
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    dataframe.to_parquet(cache_path, compression="snappy", index=False)
+    return dataframe
+
+
+def export_table(dataframe: pd.DataFrame, csv_path: Path, write_csv: bool = WRITE_CSV) -> None:
+    # parquet sits next to the csv path (same name, .parquet), much quicker to read back downstream
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(dataframe, preserve_index=False)
+    pq.write_table(table, csv_path.with_suffix(".parquet"), compression="snappy")
+    if write_csv:
+        # csv stays on pandas' writer: pac.write_csv quotes strings, writes true/false and drops
+        # the '.0' off whole floats, which would change the committed csv text
+        dataframe.to_csv(csv_path, index=False)
+
+
+def sid_mask(sid: pd.Series, storm_ids) -> np.ndarray:
+    """
+    Boolean row mask for rows whose (categorical) SID is in storm_ids.
+    Marks the wanted category codes once, then it's a single gather over the int codes
+    instead of isin hashing every row's string.
+    """
+    categories = sid.cat.categories
+    code_mask = np.zeros(categories.size, dtype=bool)
+    idx = categories.get_indexer(storm_ids)
+    code_mask[idx[idx >= 0]] = True
+    codes = sid.cat.codes.to_numpy()
+    return code_mask[codes] & (codes >= 0)  # code -1 is a missing SID, never a match
+
+
+def drop_track_duplicates(tracks: pd.DataFrame, lon_column: str = "LON") -> pd.DataFrame:
+    """
+    Same result as tracks.drop_duplicates(subset=["SID", "ISO_TIME", "LAT", lon_column]).
+    The four columns are mixed into one uint64 key first, so the bulk of the rows go through the
+    1-d integer duplicated kernel; only rows whose key repeats get the exact multi-column check,
+    which keeps it correct even if two different rows ever hash to the same key.
+    """
+    subset = ["SID", "ISO_TIME", "LAT", lon_column]
+    key = tracks["SID"].cat.codes.to_numpy().astype(np.uint64)
+    # + 0.0 turns -0.0 into 0.0 so equal coordinates always have equal bits
+    for part in (
+        tracks["ISO_TIME"].to_numpy().view(np.int64).view(np.uint64),
+        (tracks["LAT"].to_numpy(dtype=np.float64) + 0.0).view(np.uint64),
+        (tracks[lon_column].to_numpy(dtype=np.float64) + 0.0).view(np.uint64),
+    ):
+        key = (key ^ part) * np.uint64(0x100000001B3)  # FNV-style mix, wraps mod 2**64
+
+    maybe_dup = np.flatnonzero(pd.Series(key).duplicated(keep=False).to_numpy())
+    keep = np.ones(len(tracks), dtype=bool)
+    keep[maybe_dup] = ~tracks.iloc[maybe_dup].duplicated(subset=subset).to_numpy()
+    return tracks[keep]
+
+
+def sort_storms(storms: pd.DataFrame) -> pd.DataFrame:
+    # (start_year, SID) order for the storm tables; SID categories are sorted strings,
+    # so lexsort on the int codes gives the same order as sorting the strings
+    order = np.lexsort((storms["SID"].cat.codes.to_numpy(), storms["start_year"].to_numpy()))
+    return storms.iloc[order].reset_index(drop=True)
+
+
+def label_intensity(wind) -> np.ndarray:
+    """
+    Intensity class per wind value (TD < 34 <= TS < 64 <= TY < 130 <= STY).
+    One searchsorted over the thresholds instead of a mask per class.
+    Missing winds get an empty label rather than silently becoming TD.
+    """
+    wind = np.asarray(wind, dtype=np.float64)
+    idx = np.searchsorted(INTENSITY_THRESHOLDS, wind, side="right") - 1
+
+    labels = np.full(wind.shape, "", dtype=object)
+    ok = np.isfinite(wind)
+    labels[ok] = INTENSITY_LABELS[np.clip(idx[ok], 0, INTENSITY_LABELS.size - 1)]
+    return labels
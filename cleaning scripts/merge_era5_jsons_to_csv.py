@@ -1,4 +1,4 @@
-import json
+import orjson
 import pandas as pd
 from pathlib import Path
 
@@ -6,6 +6,7 @@ from pathlib import Path
 
 RAW_DATA_DIR = Path("data/raw/era5")
 OUTPUT_CSV_PATH = Path("data/processed/ERA5/merged_era5_data.csv")
+OUTPUT_PARQUET_PATH = OUTPUT_CSV_PATH.with_suffix(".parquet") # what the dashboard actually loads
 
 JSON_FILES = [
     "era5_phl_annual_1950_2023_cdd_r50mm_r95ptot.json",
@@ -28,34 +29,33 @@ COLUMN_ORDER = [
 # Method to load aformentioned JSON files into a single DataFrame
 
 def json_to_dataframe(path: Path, country_code: str = "PHL") -> pd.DataFrame:
-    with open(path, "r") as file:
-        raw = json.load(file) 
+    raw = orjson.loads(path.read_bytes()) # orjson parses straight from the bytes, quicker than json.load
 
     data = raw["data"] # bc raw is a json object, we can reference key directly as a dict
-    parts = []
 
-    for var_name, var_payload in data.items():
-        series = pd.Series(var_payload[country_code], name=var_name)
-        parts.append(series)
-
-    dataframe = pd.concat(parts, axis=1) # lines things up side-by-side (this way <-->)
-    dataframe.index = pd.to_datetime(dataframe.index).year # converts "YYYY-07" to just year (as int)
+    # one column per variable, built in a single DataFrame call (rows line up on the "YYYY-07" keys)
+    dataframe = pd.DataFrame({var_name: var_payload[country_code] for var_name, var_payload in data.items()})
+    dataframe.index = pd.to_datetime(dataframe.index, format="%Y-%m").year # converts "YYYY-07" to just year (as int), explicit format = no per-row format guessing
     dataframe.index.name = "year" # names index for clarity, was using key-value pairs before
-    dataframe = dataframe.reset_index() # makes year a column instead of index for merging later
+    # year stays as the index, it's what the files get lined up on below
 
     dataframe = dataframe.rename(columns={"prpercnt": "prpercent"}) # personal preference to rename prpercnt to prpercent for less ambiguity later 
 
     return dataframe
 
 # loops through all json files and populates dataframes list with dataframes created from each file bosh
+# (indexed by year, since that's what links the 'triple tables')
 dataframes = [json_to_dataframe(RAW_DATA_DIR / filename) for filename in JSON_FILES]
 
-# we then merge all 'triple tables' on year as its linking key
-merged = dataframes[0]
-for dataframe in dataframes [1:]:
-    merged = merged.merge(dataframe, on="year", how="inner")
+# every file has the same yearly index, so line them up side-by-side in one concat
+# instead of merging one table at a time (inner join = only years present in all files)
+merged = pd.concat(dataframes, axis=1, join="inner")
+
+duplicated = merged.columns[merged.columns.duplicated()].tolist()
+if duplicated:
+    raise KeyError(f"Same variable found in more than one ERA5 file: {duplicated}")
 
-merged = merged.sort_values("year").reset_index(drop=True)
+merged = merged.sort_index().reset_index()
 
 # double check column order is same, or if something is missing after merge
 missing = [c for c in COLUMN_ORDER if c not in merged.columns]
@@ -68,7 +68,9 @@ merged = merged[COLUMN_ORDER]
 
 OUTPUT_CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
 merged.to_csv(OUTPUT_CSV_PATH, index=False)
+merged.to_parquet(OUTPUT_PARQUET_PATH, compression="zstd", index=False)
 
 print(f"Saved CSV to {OUTPUT_CSV_PATH}")
+print(f"Saved parquet to {OUTPUT_PARQUET_PATH}")
 print("Columns:", merged.columns.tolist())
 print("Rows:", len(merged))
\ No newline at end of file
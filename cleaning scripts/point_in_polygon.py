@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def pip_crossing(xs: np.ndarray, ys: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """
+    Crossing-number point-in-polygon test for many points against one ring.
+    xs/ys are the query points (lon, lat), px/py the ring vertices in order.
+    Loops over edges (a few thousand at most) and stays vectorised over points.
+
+    Uses the same tie-breaking as matplotlib's Path.contains_points, so points
+    sitting exactly on an edge (common with round-degree PAR boundaries) are
+    classified the same way as before.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    inside = np.zeros(xs.shape, dtype=bool)
+
+    j = px.size - 1
+    for k in range(px.size):
+        x0, y0, x1, y1 = px[j], py[j], px[k], py[k]
+        j = k
+        if y0 == y1:
+            continue  # horizontal edge never flips the count
+
+        # only points whose latitude sits between the edge ends can cross it
+        end_above = ys <= y1
+        band = np.flatnonzero((ys <= y0) != end_above)
+        if band.size == 0:
+            continue
+        crosses = ((y1 - ys[band]) * (x0 - x1) >= (x1 - xs[band]) * (y0 - y1)) == end_above[band]
+        inside[band[crosses]] ^= True
+
+    return inside
+
+
+def pip_any_ring(
+    xs: np.ndarray, ys: np.ndarray, verts: np.ndarray, offsets: np.ndarray, bboxes: np.ndarray
+) -> np.ndarray:
+    """
+    True where a point falls inside ANY ring of a multi-ring shape.
+    Rings are stored flat: ring r is verts[offsets[r]:offsets[r + 1]] (lon, lat columns),
+    bboxes[r] = (minx, miny, maxx, maxy). Bounding boxes are checked first so each ring
+    only runs the crossing test on the few points near it.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    hit = np.zeros(xs.shape, dtype=bool)
+
+    # most points are nowhere near the shape, drop everything outside the overall bbox first
+    gminx, gminy = bboxes[:, 0].min(), bboxes[:, 1].min()
+    gmaxx, gmaxy = bboxes[:, 2].max(), bboxes[:, 3].max()
+    cand = np.flatnonzero((xs >= gminx) & (xs <= gmaxx) & (ys >= gminy) & (ys <= gmaxy))
+    cand_x, cand_y = xs[cand], ys[cand]
+
+    for r, (bx0, by0, bx1, by1) in enumerate(bboxes):
+        in_bbox = np.flatnonzero((cand_x >= bx0) & (cand_x <= bx1) & (cand_y >= by0) & (cand_y <= by1))
+        if in_bbox.size == 0:
+            continue
+        ring = verts[offsets[r]:offsets[r + 1]]
+        hit[cand[in_bbox]] |= pip_crossing(cand_x[in_bbox], cand_y[in_bbox], ring[:, 0], ring[:, 1])
+    return hit
@@ -0,0 +1,38 @@
+"""
+Runs every IBTrACS cleaning output off a single load of the raw file.
+Each script still works standalone, this just avoids paying for the read/clean more than once.
+run from the repo root: python "cleaning scripts/run_ibtracs_pipeline.py"
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from ibtracs_common import load_and_clean
+from clean_ibtracs_par_1950_2023 import emit_par
+from clean_ibtracs_par_1950_2023_landfall import PH_GEOJSON_PATH, emit_landfall, load_geojson_rings
+
+
+# the outputs don't depend on each other, so each one runs in its own process.
+# workers re-load from the parquet cache the parent just warmed (a fast columnar read)
+# instead of having the whole frame pickled over to them.
+def _run_par():
+    emit_par(load_and_clean())
+
+
+def _run_landfall():
+    ph_verts, ph_offsets, ph_bboxes = load_geojson_rings(PH_GEOJSON_PATH)
+    emit_landfall(load_and_clean(), ph_verts, ph_offsets, ph_bboxes)
+
+
+VARIANTS = [
+    _run_par,       # PAR polygon (v3 outputs)
+    _run_landfall,  # PH landfall (v4 outputs)
+]
+
+
+if __name__ == "__main__":
+    # parse the raw csv once, up front, so no worker has to
+    load_and_clean()
+
+    with ProcessPoolExecutor(max_workers=len(VARIANTS)) as pool:
+        futures = [pool.submit(variant) for variant in VARIANTS]
+        for future in futures:
+            future.result()  # re-raise anything that failed in a worker
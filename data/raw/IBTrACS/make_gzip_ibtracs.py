@@ -1,28 +1,60 @@
 ### NOTE: Had to compress original ibtracs.WP.list.v04r01.csv due to 
 ### "remote: error: File data/raw/IBTrACS/ibtracs.WP.list.v04r01.csv is 108.19 MB;
 ### this exceeds GitHub Enterprise's file size limit of 100.00 MB"
+### now written as zstd parquet instead of gzip csv: smaller again, and typed + columnar so it loads without re-parsing text
+### (read by load_and_clean in cleaning scripts/ibtracs_common.py, RAW_PARQUET_PATH there)
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
+import pyarrow.parquet as pq
 from pathlib import Path
 
 INPUT_CSV_PATH = Path("data/raw/IBTrACS/ibtracs.WP.list.v04r01.csv")
-OUTPUT_GZ_PATH = Path("data/raw/IBTrACS/ibtracs_full.csv.gz")
+OUTPUT_PARQUET_PATH = Path("data/raw/IBTrACS/ibtracs_full.parquet")
 
-dataframe = pd.read_csv(
+BLOCK_SIZE = 1 << 23  # 8 MB of csv text per batch
+
+# explicit types for the columns the cleaning scripts actually use, so nothing has to be inferred
+# (and no block can infer a different type to the one before it). everything else stays text.
+# the numeric ones are floats, not ints: a single "40.0"-style cell in an int column would abort
+# the whole streamed conversion
+COLUMN_TYPES = {
+    "SID": pa.string(),
+    "SEASON": pa.float32(),
+    "NAME": pa.string(),
+    "ISO_TIME": pa.timestamp("s"),
+    "NATURE": pa.dictionary(pa.int32(), pa.string()),  # handful of codes (TS/NR/ET/...) stored once per block
+    "LAT": pa.float64(),
+    "LON": pa.float64(),
+    "USA_WIND": pa.float32(),
+    "USA_PRES": pa.float32(),
+}
+
+# streamed: one csv block is parsed + written as its own row group at a time, so peak memory
+# is a block or two instead of the whole 108 MB file (plus pandas' copy of it) in one go.
+# the units row under the header (" ", "Year", "degrees_north", ...) is skipped, otherwise it
+# would force every column back to text
+header = pac.open_csv(INPUT_CSV_PATH, read_options=pac.ReadOptions(block_size=BLOCK_SIZE)).schema.names
+reader = pac.open_csv(
     INPUT_CSV_PATH,
-    low_memory=False,
+    read_options=pac.ReadOptions(block_size=BLOCK_SIZE, skip_rows_after_names=1),
+    convert_options=pac.ConvertOptions(
+        column_types={name: COLUMN_TYPES.get(name, pa.string()) for name in header},
+        null_values=["", " "],
+        strings_can_be_null=True,
+    ),
 )
 
-OUTPUT_GZ_PATH.parent.mkdir(parents=True, exist_ok=True)
+OUTPUT_PARQUET_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-dataframe.to_csv(
-    OUTPUT_GZ_PATH,
-    index=False,
-    compression="gzip",
-)
+n_rows = 0
+with pq.ParquetWriter(OUTPUT_PARQUET_PATH, reader.schema, compression="zstd") as writer:
+    for batch in reader:
+        writer.write_batch(batch)
+        n_rows += batch.num_rows
 
-print("Compressed IBTrACS CSV saved to:")
-print(OUTPUT_GZ_PATH)
-print("File size (bytes):", OUTPUT_GZ_PATH.stat().st_size)
-print("Rows:", len(dataframe))
-print("Columns:", len(dataframe.columns))
+print("Compressed IBTrACS parquet saved to:")
+print(OUTPUT_PARQUET_PATH)
+print("File size (bytes):", OUTPUT_PARQUET_PATH.stat().st_size)
+print("Rows:", n_rows)
+print("Columns:", len(header))
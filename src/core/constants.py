@@ -9,6 +9,9 @@ from __future__ import annotations
 
 from pathlib import Path
 
+# resolved once at import (the pages re-run top to bottom on every interaction, this module doesn't)
+REPO_ROOT: Path = Path(__file__).resolve().parents[2]
+
 # ERA5 paths + merge config
 RAW_ERA5_DIR: Path = Path("data/raw/era5")
 PROCESSED_ERA5_DIR: Path = Path("data/processed/ERA5")
@@ -20,6 +23,7 @@ ERA5_JSON_FILES: list[str] = [
 ]
 
 ERA5_OUTPUT_CSV_PATH: Path = PROCESSED_ERA5_DIR / "merged_era5_data.csv"
+ERA5_OUTPUT_PARQUET_PATH: Path = PROCESSED_ERA5_DIR / "merged_era5_data.parquet"  # what the dashboard loads
 
 ERA5_COLUMN_ORDER: list[str] = [
     "year",
@@ -39,10 +43,15 @@ ERA5_COLUMN_ORDER: list[str] = [
 RAW_IBTRACS_DIR: Path = Path("data/raw/IBTrACS")
 PROCESSED_IBTRACS_V2_DIR: Path = Path("data/processed/IBTrACS/v2")
 
-IBTRACS_RAW_CSV_GZ_PATH: Path = RAW_IBTRACS_DIR / "ibtracs_wp_full.csv.gz"
+IBTRACS_RAW_PARQUET_PATH: Path = RAW_IBTRACS_DIR / "ibtracs_full.parquet"  # what make_gzip_ibtracs.py writes
+IBTRACS_RAW_CSV_GZ_PATH: Path = RAW_IBTRACS_DIR / "ibtracs_wp_full.csv.gz"  # older gzip csv copy
 IBTRACS_OUT_TRACKS_PATH: Path = PROCESSED_IBTRACS_V2_DIR / "ibtracs_par_1950_2023_tracks_2.csv"
 IBTRACS_OUT_STORMS_PATH: Path = PROCESSED_IBTRACS_V2_DIR / "ibtracs_par_1950_2023_storms_2.csv"
 
+# storm tables the dashboard + the overview kpi build read
+PAR_V3_STORMS: Path = Path("data/processed/IBTrACS/v3_within_par/ibtracs_par_1950_2023_storms_3.parquet")
+LANDFALL_V4_STORMS: Path = Path("data/processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_storms.parquet")
+
 # Shared analysis scope
 START_YEAR: int = 1950
 END_YEAR: int = 2023
@@ -52,6 +61,9 @@ END_YEAR: int = 2023
 WIND_COLUMN: str = "USA_WIND"
 KEEP_NATURE: set[str] = {"TD", "TS", "TY"}
 
+# intensity labels as loaded by the dashboard (UNK = no usable wind)
+INTENSITY_CATEGORIES: list[str] = ["TD", "TS", "TY", "STY", "UNK"]
+
 
 # common IBTrACS columns likely referenced
 COL_SEASON: str = "SEASON"
@@ -1,35 +1,73 @@
 
-## loaders to load v3 v4 csvs
+## shared loaders for the v3 / v4 storm tables + merged ERA5, used by every page
 
 # src/core/data.py
-from pathlib import Path
-
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
-PAR_V3_STORMS = Path("data/processed/IBTrACS/v3_within_par/ibtracs_par_1950_2023_storms_3.csv")
-LANDFALL_V4_STORMS = Path("data/processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_storms.csv")
+from core.constants import ERA5_OUTPUT_PARQUET_PATH, INTENSITY_CATEGORIES, LANDFALL_V4_STORMS, PAR_V3_STORMS
+from core.io import read_parquet_table
+from core.kpis import read_overview_kpis
+
+
+def as_intensity_category(series: pd.Series) -> pd.Categorical:
+    # fixed TD/TS/TY/STY/UNK categories: compares + counts run on int8 codes, anything unexpected -> UNK
+    return pd.Categorical(series, categories=INTENSITY_CATEGORIES).fillna("UNK")
+
+
+# the arrow tables are loaded once per server process (cache_resource = one shared object,
+# not a pickled copy per page), and every page gets its own pandas frame off them below.
+# label clean-up happens on the arrow side so that work is cached too
+# (start_year is already int32 in the parquet files, nothing to cast).
+@st.cache_resource(show_spinner=False)
+def _par_v3_table() -> pa.Table:
+    return read_parquet_table(PAR_V3_STORMS, label_columns=("par_peak_intensity",))
+
+
+@st.cache_resource(show_spinner=False)
+def _landfall_v4_table() -> pa.Table:
+    return read_parquet_table(LANDFALL_V4_STORMS, label_columns=("landfall_intensity", "peak_intensity"))
 
 
-@st.cache_data
-def load_ibtracs_par_v3(path: Path = PAR_V3_STORMS) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    df["par_peak_intensity"] = df["par_peak_intensity"].astype(str).str.upper().str.strip()
-    df["start_year"] = pd.to_numeric(df["start_year"], errors="coerce")
+@st.cache_resource(show_spinner=False)
+def _era5_table() -> pa.Table:
+    if not ERA5_OUTPUT_PARQUET_PATH.exists():
+        raise FileNotFoundError(f"ERA5 merged parquet not found at: {ERA5_OUTPUT_PARQUET_PATH}")
+    return read_parquet_table(ERA5_OUTPUT_PARQUET_PATH)
+
+
+def get_par_v3() -> pd.DataFrame:
+    df = _par_v3_table().to_pandas()
+    df["par_peak_intensity"] = as_intensity_category(df["par_peak_intensity"])
     return df
 
 
-@st.cache_data
-def load_ibtracs_landfall_v4(path: Path = LANDFALL_V4_STORMS) -> pd.DataFrame:
-    df = pd.read_csv(path)
+def get_landfall_v4() -> pd.DataFrame:
+    # These normalisations won’t break if some cols are missing (read_parquet_table skips them)
+    df = _landfall_v4_table().to_pandas()
+    for col in ("landfall_intensity", "peak_intensity"):
+        if col in df.columns:
+            df[col] = as_intensity_category(df[col])
+    return df
+
 
-    # These normalisations won’t break if some cols are missing
-    if "landfall_intensity" in df.columns:
-        df["landfall_intensity"] = df["landfall_intensity"].astype(str).str.upper().str.strip()
-    if "peak_intensity" in df.columns:
-        df["peak_intensity"] = df["peak_intensity"].astype(str).str.upper().str.strip()
+def get_era5() -> pd.DataFrame:
+    """
+    Expected columns include:
+    year, cwd, rx1day, rx5day, pr, prpercent, r20mm, r50mm, r95ptot, ...
+    """
+    df = _era5_table().to_pandas()
 
-    if "start_year" in df.columns:
-        df["start_year"] = pd.to_numeric(df["start_year"], errors="coerce")
+    # make 'year' usable everywhere
+    if "year" in df.columns:
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
 
     return df
+
+
+def get_overview_kpis() -> dict | None:
+    # prebuilt by cleaning scripts/build_overview_kpis.py; None (= compute on the page) if missing or stale.
+    # not cached: the staleness check only hashes two small parquet files per rerun, and it has to
+    # notice a json / table rebuilt while the app is running
+    return read_overview_kpis(sources=(PAR_V3_STORMS, LANDFALL_V4_STORMS))
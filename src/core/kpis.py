@@ -0,0 +1,149 @@
+"""
+Overview headline numbers (exposure vs impact), computed from the v3 / v4 storm tables.
+Pure pandas (no streamlit), so the ETL side can build them once into a small json.
+
+Location: src/core/kpis.py
+Import pattern (from any file under src/): from core.kpis import ...
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+OVERVIEW_KPIS_PATH: Path = Path("data/processed/overview_kpis.json")
+
+INTENSITY_CLASSES: list[str] = ["TD", "TS", "TY", "STY"]
+INTENSITY_CODES: dict[str, int] = {c: i for i, c in enumerate(INTENSITY_CLASSES)}
+
+
+def normalise_intensity(series: pd.Series) -> pd.Series:
+    # just making sure labels like "ty " become "TY"
+    # the core.data loaders already do this on the arrow side (fixed-category labels), so skip those
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    # anything else goes through arrow-backed strings: upper/strip run as arrow's utf8 kernels
+    # over the whole buffer instead of one python str call per cell
+    return series.astype("string[pyarrow]").str.upper().str.strip()
+
+
+def as_class_category(series: pd.Series) -> pd.Categorical:
+    # normalised labels as a TD/TS/TY/STY categorical (anything else -> code -1)
+    return pd.Categorical(normalise_intensity(series), categories=INTENSITY_CLASSES)
+
+
+def encode_intensity(series: pd.Series) -> np.ndarray:
+    # int8 class codes (TD=0 .. STY=3, anything else -1), so every later filter / count is an int op:
+    # codes >= 0 instead of isin, np.bincount(codes[codes >= 0], minlength=4) instead of a scan per class
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # loader categoricals: only the handful of categories get re-mapped, not every row
+        return np.asarray(pd.Categorical(series, categories=INTENSITY_CLASSES).codes, dtype=np.int8)
+    return normalise_intensity(series).map(INTENSITY_CODES).fillna(-1).to_numpy(dtype=np.int8)
+
+
+def to_bool(s: pd.Series) -> pd.Series:
+    # bool columns (what the parquet files hold) pass straight through, 0/1 is a numeric compare;
+    # only text flags ("True"/"yes"/...) pay for the string route
+    if s.dtype == bool:
+        return s
+    if pd.api.types.is_bool_dtype(s):
+        return s.fillna(False).astype(bool)  # nullable boolean: missing -> not a landfall
+    if pd.api.types.is_numeric_dtype(s):
+        return s == 1
+    return s.astype(str).str.lower().isin(["true", "1", "yes"])
+
+
+def count_classes(df: pd.DataFrame, intensity_col: str) -> tuple[dict, dict, float]:
+    # count how many storms fall into each intensity bucket
+    # one bincount over the int8 codes instead of a separate == scan per class
+    codes = encode_intensity(df[intensity_col])
+    counts = dict(zip(INTENSITY_CLASSES, np.bincount(codes[codes >= 0], minlength=len(INTENSITY_CLASSES)).tolist()))
+
+    total = int(df.shape[0])
+    props = {c: (counts[c] / total * 100.0) if total else 0.0 for c in INTENSITY_CLASSES}
+
+    # TY + STY share = “stronger storms”
+    high_share = ((counts["TY"] + counts["STY"]) / total * 100.0) if total else 0.0
+    return counts, props, high_share
+
+
+def count_storms(sid: pd.Series) -> int:
+    # distinct SIDs. categorical SIDs count on their int codes; anything else goes via arrow strings,
+    # so the hashing runs over one contiguous byte buffer instead of python str objects
+    if not isinstance(sid.dtype, pd.CategoricalDtype):
+        sid = sid.astype("string[pyarrow]")
+    return int(sid.nunique())
+
+
+def compute_overview_kpis(par_df: pd.DataFrame, landfall_df: pd.DataFrame) -> dict:
+    """
+    Every number the exposure-vs-impact section shows. Expects the columns the Overview checks for
+    (SID/start_year/par_peak_intensity in v3, landfall_intensity or peak_intensity in v4).
+    Plain ints/floats/strs only, so the result round-trips through json unchanged.
+    """
+    # prefer landfall intensity if present, otherwise fallback
+    land_intensity_col = "landfall_intensity" if "landfall_intensity" in landfall_df.columns else "peak_intensity"
+
+    # only the columns the kpis need (not a full copy of both frames);
+    # the normalised columns are new Series, so the input frames are never mutated
+    par = pd.DataFrame({
+        "SID": par_df["SID"],
+        "start_year": pd.to_numeric(par_df["start_year"], errors="coerce"),
+        "par_peak_intensity": as_class_category(par_df["par_peak_intensity"]),
+    })
+    land_cols = [c for c in ("SID", "any_landfall") if c in landfall_df.columns]
+    land = landfall_df[land_cols].assign(**{land_intensity_col: as_class_category(landfall_df[land_intensity_col])})
+
+    # defensive filter (some versions might keep non-landfall rows); the flag is a bool column,
+    # so it indexes directly instead of going through an == True pass first
+    if "any_landfall" in land.columns:
+        land = land[to_bool(land["any_landfall"]).to_numpy()]
+
+    # if SID is missing, we assume one row per storm (not ideal but ok)
+    land_has_sid = "SID" in land.columns
+
+    par_total = count_storms(par["SID"])
+    land_total = count_storms(land["SID"]) if land_has_sid else int(land.shape[0])
+    conversion_rate = (land_total / par_total * 100.0) if par_total else 0.0
+
+    # PAR defines the coverage window
+    years = par["start_year"].dropna()
+    start_year, end_year = (int(y) for y in years.agg(["min", "max"])) if not years.empty else (None, None)
+
+    # intensity composition for both subsets
+    par_counts, _, par_high_share = count_classes(par, "par_peak_intensity")
+    land_counts, _, land_high_share = count_classes(land, land_intensity_col)
+
+    return {
+        "land_intensity_col": land_intensity_col,
+        "land_has_sid": land_has_sid,
+        "par_total": par_total,
+        "land_total": land_total,
+        "conversion_rate": conversion_rate,
+        "start_year": start_year,
+        "end_year": end_year,
+        "par_counts": par_counts,
+        "land_counts": land_counts,
+        # difference in strong-storm share, in percentage points
+        "severity_shift_pp": land_high_share - par_high_share,
+    }
+
+
+def source_signatures(sources: tuple[Path, ...]) -> dict[str, str]:
+    # sha256 of each source table, keyed by its repo-relative path.
+    # content, not mtime: a fresh git clone stamps every file with the checkout time
+    return {Path(src).as_posix(): hashlib.sha256(Path(src).read_bytes()).hexdigest() for src in sources}
+
+
+def read_overview_kpis(path: Path = OVERVIEW_KPIS_PATH, sources: tuple[Path, ...] = ()) -> dict | None:
+    # the prebuilt json, or None if it's missing / was built from different tables than the ones on disk
+    if not path.exists():
+        return None
+    kpis = json.loads(path.read_text(encoding="utf-8"))
+    if kpis.pop("sources", None) != source_signatures(sources):
+        return None
+    return kpis
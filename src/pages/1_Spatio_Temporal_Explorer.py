@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-import sys
+import pyarrow as pa
+import pyarrow.compute as pc
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
-DATA = REPO_ROOT / "data"
+# same core./visualisations. imports as the other pages (streamlit puts src/ on the path), so this page
+# shares their module-level caches instead of getting a second copy under src.core.*
+from core.constants import REPO_ROOT
+from core.data import get_landfall_v4
+from core.io import read_parquet_table
+from visualisations.spatio_temporal_explorer import render_spatio_temporal_explorer
 
-from src.visualisations.spatio_temporal_explorer import render_spatio_temporal_explorer
+DATA = REPO_ROOT / "data"
 
 
 
@@ -17,43 +19,54 @@ st.set_page_config(
     layout="wide"
 )
 
-STORMS_V4 = DATA / "processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_storms.csv"
-TRACKS_V4 = DATA / "processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_tracks.csv"
+TRACKS_V4 = DATA / "processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_tracks.parquet"
 
 PH_GEOJSON = DATA / "assets/geo/philippines.geojson"
 
 
-@st.cache_data(show_spinner=False)
-def load_storms() -> pd.DataFrame:
-    df = pd.read_csv(STORMS_V4)
-    df["start_year"] = df["start_year"].astype(int)
-    df["peak_intensity"] = df["peak_intensity"].fillna("UNK")
-    return df
+# the only track columns the explorer touches (NATURE / year never get used)
+TRACK_COLUMNS = ["SID", "ISO_TIME", "LAT", "LON", "LON_180", "USA_WIND", "on_ph_land"]
 
-@st.cache_data(show_spinner=False)
-def load_tracks() -> pd.DataFrame:
-    df = pd.read_csv(TRACKS_V4)
 
-    df["ISO_TIME"] = pd.to_datetime(df["ISO_TIME"], errors="coerce", utc=True)
-    df["year"] = df["year"].astype(int)
-
-    # on_ph_land exists in v4
-    if "on_ph_land" in df.columns:
-        df["on_ph_land"] = df["on_ph_land"].astype(bool)
-    else:
+@st.cache_resource(show_spinner=False)
+def load_tracks() -> pd.DataFrame:
+    # every v4 track, loaded once per server process and shared (cache_resource: one object, never
+    # written to, not an unpickled copy per rerun): the explorer's path index is built once over it
+    # and each sidebar selection is just a set of slices out of that
+    # explicit types up front: dictionary-encoded SIDs (a categorical in pandas, so the explorer's
+    # SID filters compare int codes), UTC timestamps, float32 coords (plenty for 0.1 degree data)
+    table = read_parquet_table(
+        TRACKS_V4,
+        columns=TRACK_COLUMNS,
+        # (SID, ISO_TIME) order from the loader, so the explorer's path index
+        # finds the rows already in track order and doesn't sort them again
+        sort_by=[("SID", "ascending"), ("ISO_TIME", "ascending")],
+        dtypes={
+            "SID": pa.dictionary(pa.int32(), pa.string()),
+            "ISO_TIME": pa.timestamp("ns", tz="UTC"),
+            "LAT": pa.float32(),
+            "LON": pa.float32(),
+            "LON_180": pa.float32(),
+        },
+    )
+
+    # plotting lon built on the arrow side: LON_180 if present (cleaner map continuity), LON where it's
+    # missing. the source columns get dropped, so pandas only ever sees the one lon column
+    lon_plot = table.column("LON")
+    if "LON_180" in table.column_names:
+        lon_plot = pc.coalesce(table.column("LON_180"), lon_plot)
+    table = table.drop_columns([c for c in ("LON", "LON_180") if c in table.column_names])
+    df = table.append_column("LON_PLOT", lon_plot).to_pandas()
+
+    # on_ph_land exists in v4 (stored as bool already, no cast needed)
+    if "on_ph_land" not in df.columns:
         df["on_ph_land"] = False
 
-    # use LON_180 if present (cleaner map continuity)
-    if "LON_180" in df.columns:
-        df["LON_PLOT"] = df["LON_180"]
-    else:
-        df["LON_PLOT"] = df["LON"]
-
     df = df.dropna(subset=["LAT", "LON_PLOT"])
     return df
 
 
-storms_df = load_storms()
+storms_df = get_landfall_v4()
 tracks_df = load_tracks()
 
 render_spatio_temporal_explorer(
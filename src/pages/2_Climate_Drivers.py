@@ -1,28 +1,11 @@
 from __future__ import annotations
 
-from pathlib import Path
 import streamlit as st
 import numpy as np
-import pandas as pd
 
+from core.data import get_era5, get_landfall_v4, get_par_v3
 from visualisations.climate_drivers import render_visual_1_baselines, render_visual_2A_correlation_heatmap
 
-PAR_V3 = Path("data/processed/IBTrACS/v3_within_par/ibtracs_par_1950_2023_storms_3.csv")
-LANDFALL_V4 = Path("data/processed/IBTrACS/v4_landfall/ibtracs_ph_landfall_1950_2023_storms.csv")
-ERA5_MERGED_CSV_PATH = Path("data/processed/ERA5/merged_era5_data.csv")
-# redundant from overview, ok for standalone page
-@st.cache_data
-def load_csv(path: Path) -> pd.DataFrame:
-    return pd.read_csv(path)
-
-@st.cache_data(show_spinner=False)
-def load_era5_merged(csv_path: Path = ERA5_MERGED_CSV_PATH) -> pd.DataFrame:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"ERA5 merged CSV not found at: {csv_path}")
-    df = pd.read_csv(csv_path)
-    if "year" in df.columns:
-        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-    return df
 
 def render_page() -> None:
     st.set_page_config(page_title="Climate Drivers", layout="wide")
@@ -35,9 +18,9 @@ def render_page() -> None:
 
     # load data (cached)
     try:
-        era5_df = load_era5_merged()
-        par_df = load_csv(PAR_V3)
-        landfall_df = load_csv(LANDFALL_V4)
+        era5_df = get_era5()
+        par_df = get_par_v3()
+        landfall_df = get_landfall_v4()
     except Exception as e:
         st.error(f"Failed to load datasets: {e}")
         st.stop()
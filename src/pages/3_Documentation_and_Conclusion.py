@@ -163,8 +163,6 @@ st.markdown("""
 
 st.divider() ### climate drivers
 
-import streamlit as st
-
 st.header("Climate Drivers – Documentation")
 
 st.markdown("""
@@ -243,8 +241,6 @@ st.markdown("""
 
 st.divider()
 
-import streamlit as st
-
 st.header("Conclusions and Reflection")
 
 st.subheader("Conclusions")
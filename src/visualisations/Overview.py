@@ -1,23 +1,8 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-
-def _normalise_intensity(series: pd.Series) -> pd.Series:
-    # just making sure labels like "ty " become "TY"
-    return series.astype(str).str.upper().str.strip()
-
-
-def _count_classes(df: pd.DataFrame, intensity_col: str) -> tuple[dict, dict, float]:
-    # count how many storms fall into each intensity bucket
-    classes = ["TD", "TS", "TY", "STY"]
-    counts = {c: int((df[intensity_col] == c).sum()) for c in classes}
-
-    total = int(df.shape[0])
-    props = {c: (counts[c] / total * 100.0) if total else 0.0 for c in classes}
-
-    # TY + STY share = “stronger storms”
-    high_share = ((counts["TY"] + counts["STY"]) / total * 100.0) if total else 0.0
-    return counts, props, high_share
+from core.kpis import INTENSITY_CLASSES, INTENSITY_CODES, compute_overview_kpis, encode_intensity, to_bool
 
 
 def _class_row(counts: dict, highlight_red: bool = False) -> None:
@@ -42,24 +27,53 @@ def _class_row(counts: dict, highlight_red: bool = False) -> None:
 
 def _intensity_pie(counts: dict) -> None:
     # pie chart for the composition (helps show “mix” not just totals)
-    import matplotlib.pyplot as plt
+    # altair arc instead of a matplotlib figure: no backend / Figure spin-up on every rerun,
+    # and it goes out through the same vega-lite json path as the timeseries chart
+    import altair as alt
 
     labels = ["TD", "TS", "TY", "STY"]
     values = [counts[l] for l in labels]
+    total = sum(values)
 
     # simple intensity gradient colours (cool -> hot)
     colours = ["#4C78A8", "#59A14F", "#F28E2B", "#E15759"]
 
-    fig, ax = plt.subplots()
-    ax.pie(
-        values,
-        labels=labels,
-        autopct="%1.1f%%",
-        startangle=90,
-        colors=colours,
+    pie_df = pd.DataFrame({
+        "intensity": labels,
+        "count": values,
+        "order": range(len(labels)),
+        "share": [f"{v / total * 100.0:.1f}%" if total else "" for v in values],
+    })
+
+    base = alt.Chart(pie_df).encode(
+        theta=alt.Theta("count:Q", stack=True),
+        order=alt.Order("order:Q"),
+        color=alt.Color("intensity:N", title="Intensity class", sort=labels, scale=alt.Scale(domain=labels, range=colours)),
+        tooltip=["intensity:N", "count:Q", "share:N"],
     )
-    ax.axis("equal")
-    st.pyplot(fig)
+    arcs = base.mark_arc(outerRadius=120)
+    shares = base.mark_text(radius=85, color="white").encode(text="share:N")
+    st.altair_chart(arcs + shares, use_container_width=True)
+
+
+@st.cache_data(show_spinner=False)
+def _clean_timeseries_frame(df: pd.DataFrame, year_col: str, intensity_col: str) -> pd.DataFrame:
+    # numeric years + TD/TS/TY/STY labels only. the input frames don't change between reruns,
+    # so this runs once per dataset instead of on every slider / multiselect move.
+    # new frames via assign only: on a cache miss df is the caller's own frame, so it mustn't be written to
+    df = df.assign(**{year_col: pd.to_numeric(df[year_col], errors="coerce")}).dropna(subset=[year_col])
+
+    # TD/TS/TY/STY as int8 codes once here: the filter below and the counting later are int ops
+    df = df.assign(**{year_col: df[year_col].astype(int), intensity_col: encode_intensity(df[intensity_col])})
+    # sorted by year, so the slider range is a searchsorted slice later instead of a mask per rerun
+    return df[df[intensity_col].to_numpy() >= 0].sort_values(year_col, kind="stable")
+
+
+@st.cache_data(show_spinner=False)
+def _overview_kpis(par_df: pd.DataFrame, landfall_df: pd.DataFrame) -> dict:
+    # fallback when there's no prebuilt kpi json: still only computed once per dataset pair
+    return compute_overview_kpis(par_df, landfall_df)
+
 
 def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.DataFrame) -> None:
     """
@@ -79,38 +93,34 @@ def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.
         horizontal=True,
     )
 
+    # only the 2-4 columns this chart needs get copied, not the whole storms table
     if mode == "PAR entries (exposure)":
-        df = par_df.copy()
+        df = par_df[["start_year", "par_peak_intensity"]].copy()
         year_col = "start_year"
         intensity_col = "par_peak_intensity"
     else:
-        df = landfall_df.copy()
-
         # landfall intensity preferred; fallback to peak intensity if needed
-        intensity_col = "landfall_intensity" if "landfall_intensity" in df.columns else "peak_intensity"
+        intensity_col = "landfall_intensity" if "landfall_intensity" in landfall_df.columns else "peak_intensity"
 
-        # if your v4 has any_landfall, filter to True
-        if "any_landfall" in df.columns:
-            df = df[df["any_landfall"] == True].copy()
+        keep = [c for c in (intensity_col, "start_year", "first_landfall_time") if c in landfall_df.columns]
+
+        # if your v4 has any_landfall, filter to True: the flag is used as the row mask directly,
+        # and rows + columns are picked in one .loc, so that's the only copy
+        rows = to_bool(landfall_df["any_landfall"]).to_numpy() if "any_landfall" in landfall_df.columns else slice(None)
+        df = landfall_df.loc[rows, keep]
 
         # v4 should ideally have start_year; if not, derive from first_landfall_time
         if "start_year" in df.columns:
             year_col = "start_year"
         elif "first_landfall_time" in df.columns:
-            df["first_landfall_time"] = pd.to_datetime(df["first_landfall_time"], errors="coerce")
+            df["first_landfall_time"] = pd.to_datetime(df["first_landfall_time"], errors="coerce", format="ISO8601")
             df["start_year"] = df["first_landfall_time"].dt.year
             year_col = "start_year"
         else:
             st.error("Landfall dataset needs 'start_year' or 'first_landfall_time' to plot a yearly time series.")
             return
 
-    # Clean columns
-    df[year_col] = pd.to_numeric(df[year_col], errors="coerce")
-    df = df.dropna(subset=[year_col])
-    df[year_col] = df[year_col].astype(int)
-
-    df[intensity_col] = df[intensity_col].astype(str).str.upper().str.strip()
-    df = df[df[intensity_col].isin(["TD", "TS", "TY", "STY"])]
+    df = _clean_timeseries_frame(df, year_col, intensity_col)
 
     if df.empty:
         st.warning("No rows available after filtering. Check intensity labels and year column.")
@@ -120,16 +130,8 @@ def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.
     min_year, max_year = int(df[year_col].min()), int(df[year_col].max())
     year_range = st.slider("Year range", min_year, max_year, (min_year, max_year), step=1)
 
-    df = df[(df[year_col] >= year_range[0]) & (df[year_col] <= year_range[1])]
-
-    # Aggregate annual counts by class
-    ts = (
-        df.groupby([year_col, intensity_col])
-        .size()
-        .reset_index(name="storm_count")
-        .rename(columns={year_col: "year", intensity_col: "intensity"})
-        .sort_values("year")
-    )
+    years = df[year_col].to_numpy()
+    df = df.iloc[np.searchsorted(years, year_range[0], side="left"):np.searchsorted(years, year_range[1], side="right")]
 
     # Optional: let user choose which lines to show
     selected = st.multiselect(
@@ -137,7 +139,17 @@ def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.
         ["TD", "TS", "TY", "STY"],
         default=["TD", "TS", "TY", "STY"],
     )
-    ts = ts[ts["intensity"].isin(selected)]
+
+    # one row per storm (year + class label) goes to the chart as-is: vega-lite does the
+    # (year, class) count itself via count(), so there's no aggregation step on our side
+    codes = df[intensity_col].to_numpy()
+    shown = np.isin(codes, [INTENSITY_CODES[c] for c in selected])
+    # streamlit ships altair data to the browser as arrow, so keep the columns narrow:
+    # int16 years + dictionary-encoded labels (4 strings + int8 codes, not a string per row)
+    ts = pd.DataFrame({
+        "year": df[year_col].to_numpy()[shown].astype(np.int16),
+        "intensity": pd.Categorical.from_codes(codes[shown], categories=INTENSITY_CLASSES),
+    })
 
     if ts.empty:
         st.warning("No data for the selected classes/year range.")
@@ -148,9 +160,9 @@ def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.
         .mark_line(point=False)
         .encode(
             x=alt.X("year:Q", title="Year"),
-            y=alt.Y("storm_count:Q", title="Storm count"),
+            y=alt.Y("count():Q", title="Storm count"),
             color=alt.Color("intensity:N", title="Intensity class"),  # different colours automatically
-            tooltip=["year:Q", "intensity:N", "storm_count:Q"],
+            tooltip=["year:Q", "intensity:N", alt.Tooltip("count():Q", title="storm_count")],
         )
         .properties(height=320)
         .interactive()
@@ -201,7 +213,7 @@ def render_intensity_frequency_timeseries(par_df: pd.DataFrame, landfall_df: pd.
         )
 
 
-def render_overview_exposure_vs_impact(par_df: pd.DataFrame, landfall_df: pd.DataFrame) -> None:
+def render_overview_exposure_vs_impact(par_df: pd.DataFrame, landfall_df: pd.DataFrame, kpis: dict | None = None) -> None:
     # sanity checks so we don’t render nonsense if files change
     required_par = {"SID", "start_year", "par_peak_intensity"}
     if not required_par.issubset(par_df.columns):
@@ -214,41 +226,20 @@ def render_overview_exposure_vs_impact(par_df: pd.DataFrame, landfall_df: pd.Dat
         st.write("Landfall columns:", list(landfall_df.columns))
         st.stop()
 
-    # prefer landfall intensity if present, otherwise fallback
-    land_intensity_col = "landfall_intensity" if "landfall_intensity" in landfall_df.columns else "peak_intensity"
-
-    par = par_df.copy()
-    land = landfall_df.copy()
+    # kpis are normally prebuilt at ETL time (cleaning scripts/build_overview_kpis.py),
+    # so a rerun just reads them; only computed here when there's no up-to-date json
+    if kpis is None:
+        kpis = _overview_kpis(par_df, landfall_df)
 
-    par["par_peak_intensity"] = _normalise_intensity(par["par_peak_intensity"])
-    par["start_year"] = pd.to_numeric(par["start_year"], errors="coerce")
-    land[land_intensity_col] = _normalise_intensity(land[land_intensity_col])
-
-    # defensive filter (some versions might keep non-landfall rows)
-    if "any_landfall" in land.columns:
-        land = land[land["any_landfall"] == True].copy()
-
-    # if SID is missing, we assume one row per storm (not ideal but ok)
-    land_has_sid = "SID" in land.columns
-    if not land_has_sid:
+    if not kpis["land_has_sid"]:
         st.warning("Landfall file has no SID column; assuming one row = one storm.")
-        land = land.reset_index().rename(columns={"index": "ROW_ID"})
-
-    par_total = int(par["SID"].nunique())
-    land_total = int(land["SID"].nunique()) if land_has_sid else int(land.shape[0])
-    conversion_rate = (land_total / par_total * 100.0) if par_total else 0.0
-
-    # PAR defines the coverage window
-    years = par["start_year"].dropna()
-    start_year = int(years.min()) if not years.empty else None
-    end_year = int(years.max()) if not years.empty else None
-
-    # intensity composition for both subsets
-    par_counts, par_props, par_high_share = _count_classes(par, "par_peak_intensity")
-    land_counts, land_props, land_high_share = _count_classes(land, land_intensity_col)
 
-    # difference in strong-storm share, in percentage points
-    severity_shift_pp = land_high_share - par_high_share
+    land_intensity_col = kpis["land_intensity_col"]
+    par_total, land_total = kpis["par_total"], kpis["land_total"]
+    conversion_rate = kpis["conversion_rate"]
+    start_year, end_year = kpis["start_year"], kpis["end_year"]
+    par_counts, land_counts = kpis["par_counts"], kpis["land_counts"]
+    severity_shift_pp = kpis["severity_shift_pp"]
 
     st.subheader("Exposure vs Impact")
     st.write(
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import io
+from typing import TYPE_CHECKING
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+from core.kpis import INTENSITY_CLASSES, encode_intensity, to_bool
+
+# matplotlib is imported inside the chart functions (like altair on the Overview), so sessions
+# that never draw a matplotlib chart don't pay for the import
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 # Canonical climate drivers (locked)
 CLIMATE_VARS_9 = [
     "cdd",
@@ -57,41 +66,59 @@ def validate_era5_df(era5_df: pd.DataFrame, required_vars: list[str] | None = No
             st.warning(f"Some requested ERA5 variables are missing and will be ignored: {missing}")
 
 
+@st.cache_data(show_spinner=False)
+def _available_climate_vars(columns: tuple[str, ...]) -> list[str]:
+    # canonical vars present in ERA5, in CLIMATE_VARS_9 order. keyed on the column names only,
+    # so it's worked out once instead of on every rerun of both visuals (no frame hashing either)
+    return [v for v in CLIMATE_VARS_9 if v in columns]
+
+
 @st.cache_data(show_spinner=False)
 def prepare_era5_timeseries(era5_df: pd.DataFrame, variables: list[str]) -> pd.DataFrame:
-    df = era5_df.copy()
     keep = ["year"] + variables
-    df = df[keep]
-
-    for v in variables:
-        df[v] = pd.to_numeric(df[v], errors="coerce")
+    # the column selection is already a new frame (no extra .copy()), and all the numeric
+    # coercions go in with one assign instead of a setitem per variable
+    df = era5_df[keep].assign(**{v: pd.to_numeric(era5_df[v], errors="coerce") for v in variables})
 
     df = df.dropna(subset=["year"]).sort_values("year")
     return df
 
 
-def make_timeseries_fig(df: pd.DataFrame, var: str, rolling_window: int | None) -> plt.Figure:
-    fig, ax = plt.subplots()
+def make_timeseries_fig(df: pd.DataFrame, var: str, label: str, rolling_window: int | None) -> Figure:
+    # a bare Figure (not plt.subplots) so it never lands in pyplot's global figure list
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
     ax.plot(df["year"], df[var], marker="o", linewidth=1)
 
     if rolling_window and rolling_window >= 2:
         rolled = df[var].rolling(window=rolling_window, min_periods=1).mean()
         ax.plot(df["year"], rolled, linewidth=2)
 
-    label = VAR_LABELS.get(var, var)
     ax.set_title(f"{label} over time")
     ax.set_ylabel(label)
     ax.grid(True, alpha=0.3)
     return fig
 
 
+@st.cache_data(show_spinner=False)
+def _timeseries_png(df: pd.DataFrame, var: str, label: str, rolling_window: int | None) -> bytes:
+    # cached per (year/var data, rolling window) as finished png bytes: toggling one variable only
+    # draws the new chart, and a cache hit is a few kB of bytes instead of a pickled Figure
+    # (same savefig settings st.pyplot uses)
+    buf = io.BytesIO()
+    make_timeseries_fig(df, var, label, rolling_window).savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    return buf.getvalue()
+
+
 def render_visual_1_baselines(era5_df: pd.DataFrame) -> None:
     st.subheader("Climate baseline trends (ERA5)")
 
     validate_era5_df(era5_df)
 
     # only allow plotting of the canonical 9 variables that exist in the dataframe
-    available_vars = [v for v in CLIMATE_VARS_9 if v in era5_df.columns]
+    available_vars = _available_climate_vars(tuple(era5_df.columns))
 
     missing_canon = [v for v in CLIMATE_VARS_9 if v not in era5_df.columns]
     if missing_canon:
@@ -139,7 +166,9 @@ def render_visual_1_baselines(era5_df: pd.DataFrame) -> None:
         key="vis1_year_range",
     )
 
-    df = df[(df["year"] >= year_range[0]) & (df["year"] <= year_range[1])]
+    # df is already year-sorted (prepare_era5_timeseries), so slice instead of masking
+    years = df["year"].to_numpy(dtype=np.int64)
+    df = df.iloc[np.searchsorted(years, year_range[0], side="left"):np.searchsorted(years, year_range[1], side="right")]
 
     # render small multiples
     for i in range(0, len(variables), charts_per_row):
@@ -147,14 +176,16 @@ def render_visual_1_baselines(era5_df: pd.DataFrame) -> None:
         cols = st.columns(len(row_vars))
         for col, var in zip(cols, row_vars):
             with col:
-                fig = make_timeseries_fig(df, var, rolling_window)
-                st.pyplot(fig, clear_figure=True)
+                label = VAR_LABELS.get(var, var)  # resolved once here, the plot code just uses it
+                st.image(_timeseries_png(df[["year", var]], var, label, rolling_window), use_container_width=True)
 
     st.caption(
         "Rolling mean is shown only to improve readability of long-run patterns; "
         "analysis focuses on multi-decadal behaviour."
     )
 
+# cached: only depends on (storms table, mode), so slider / metric changes reuse it
+@st.cache_data(show_spinner=False)
 def build_storm_year_metrics(storms_df: pd.DataFrame, mode: str) -> pd.DataFrame:
     """
     Annual storm metrics from storms-level tables.
@@ -171,8 +202,9 @@ def build_storm_year_metrics(storms_df: pd.DataFrame, mode: str) -> pd.DataFrame
         st.error("Storms dataset missing required column: 'start_year'.")
         st.stop()
 
-    df = storms_df.copy()
-    df = df.dropna(subset=["start_year"])
+    # only the columns the metrics read (not a full copy of the storms table)
+    keep = [c for c in ("SID", "start_year", "max_wind", "any_landfall", "par_peak_intensity", "landfall_intensity", "peak_intensity") if c in storms_df.columns]
+    df = storms_df[keep].dropna(subset=["start_year"])
     df["start_year"] = pd.to_numeric(df["start_year"], errors="coerce").astype(int)
 
     if mode == "v3_par":
@@ -183,9 +215,8 @@ def build_storm_year_metrics(storms_df: pd.DataFrame, mode: str) -> pd.DataFrame
 
     elif mode == "v4_landfall":
         if "any_landfall" in df.columns:
-            # handle bool, 0/1, strings
-            df["any_landfall"] = df["any_landfall"].astype(str).str.lower().isin(["true", "1", "yes"])
-            df = df[df["any_landfall"] == True]
+            # handle bool, 0/1, strings; index with the raw numpy mask (no == True pass over it)
+            df = df[to_bool(df["any_landfall"]).to_numpy()]
 
         intensity_col = "landfall_intensity"
         if intensity_col not in df.columns:
@@ -198,64 +229,87 @@ def build_storm_year_metrics(storms_df: pd.DataFrame, mode: str) -> pd.DataFrame
         st.error(f"Unknown mode: {mode}")
         st.stop()
 
-    # Base metrics
-    out = (
-        df.groupby("start_year")
-        .agg(
-            storm_count=("SID", "nunique"),
-            mean_max_wind=("max_wind", "mean"),
-        )
-        .reset_index()
-        .rename(columns={"start_year": "year"})
-    )
-
-    # Counts by class (TD/TS/TY/STY)
-    class_counts = (
-        df.groupby(["start_year", intensity_col])["SID"]
-        .nunique()
-        .unstack(fill_value=0)
-        .reset_index()
-        .rename(columns={"start_year": "year"})
-    )
-
-    for c in ["TD", "TS", "TY", "STY"]:
-        if c not in class_counts.columns:
-            class_counts[c] = 0
-
-    class_counts = class_counts.rename(
-        columns={"TD": "td_count", "TS": "ts_count", "TY": "ty_count", "STY": "sty_count"}
-    )
-    class_counts["ty_sty_count"] = class_counts["ty_count"] + class_counts["sty_count"]
-
-    out = out.merge(
-        class_counts[["year", "td_count", "ts_count", "ty_count", "sty_count", "ty_sty_count"]],
-        on="year",
-        how="left",
-    )
-
-    for c in ["storm_count", "td_count", "ts_count", "ty_count", "sty_count", "ty_sty_count"]:
-        out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).astype(int)
+    # SID is the natural key of the storms tables: dedupe once here (missing SIDs never counted,
+    # same as nunique did), then every count below is a plain bincount / size, no per-group uniques
+    df = df[df["SID"].notna().to_numpy()].drop_duplicates("SID")
+
+    # all six count columns + the wind mean from flat bincounts over (year, class) codes,
+    # instead of two groupbys, an unstack and a merge
+    classes = INTENSITY_CLASSES
+    years, year_idx = np.unique(df["start_year"].to_numpy(), return_inverse=True)  # sorted, like groupby
+    n_years = len(years)
+    class_codes = encode_intensity(df[intensity_col])
+
+    storm_count = np.bincount(year_idx, minlength=n_years)
+
+    has_class = class_codes >= 0
+    year_class = year_idx[has_class] * len(classes) + class_codes[has_class]
+    class_counts = np.bincount(year_class, minlength=n_years * len(classes)).reshape(n_years, len(classes))
+
+    # annual mean of storm max_wind (NaNs skipped, all-NaN year -> NaN, like groupby mean)
+    wind = pd.to_numeric(df["max_wind"], errors="coerce").to_numpy(dtype=np.float64)
+    has_wind = ~np.isnan(wind)
+    wind_sum = np.bincount(year_idx[has_wind], weights=wind[has_wind], minlength=n_years)
+    wind_n = np.bincount(year_idx[has_wind], minlength=n_years)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_max_wind = wind_sum / wind_n
+
+    # the bincounts are int64 already with every year present (no NaNs to fill), so the columns
+    # go in as-is, no coerce / fillna / cast pass afterwards
+    out = pd.DataFrame({
+        "year": years,
+        "storm_count": storm_count,
+        "mean_max_wind": mean_max_wind,
+        "td_count": class_counts[:, 0],
+        "ts_count": class_counts[:, 1],
+        "ty_count": class_counts[:, 2],
+        "sty_count": class_counts[:, 3],
+        "ty_sty_count": class_counts[:, 2] + class_counts[:, 3],
+    })
 
     return out
 
 
+@st.cache_data(show_spinner=False)
 def merge_climate_and_storm_metrics(
     era5_df: pd.DataFrame, year_metrics_df: pd.DataFrame, climate_vars: list[str]
 ) -> pd.DataFrame:
     """Inner-join climate and annual storm metrics by year."""
-    c = era5_df.copy()
-    c["year"] = pd.to_numeric(c["year"], errors="coerce").astype(int)
-
     keep = ["year"] + climate_vars
-    c = c[keep]
+    c = era5_df[keep].copy()
+    c["year"] = pd.to_numeric(c["year"], errors="coerce").astype(int)
 
     for v in climate_vars:
         c[v] = pd.to_numeric(c[v], errors="coerce")
 
-    merged = c.merge(year_metrics_df, on="year", how="inner")
+    # year-sorted once here, so the render path can slice the slider range with searchsorted
+    merged = c.merge(year_metrics_df, on="year", how="inner").sort_values("year", ignore_index=True)
     return merged
 
 
+def _corr_with_last(arr: np.ndarray) -> np.ndarray:
+    """
+    Pearson r of every column of arr against its last column, shape (n_cols - 1,).
+    No gaps (the usual case): a single np.corrcoef call. With NaNs each pair falls back to its
+    complete rows, same as Series.corr.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if not np.isnan(arr).any():
+            # under 3 rows every column fails the heatmap's n >= 3 guard anyway, and on a single row
+            # corrcoef warns through warnings.warn (degrees of freedom), which errstate doesn't silence
+            if arr.shape[0] < 3:
+                return np.full(arr.shape[1] - 1, np.nan)
+            return np.corrcoef(arr, rowvar=False)[-1, :-1]
+
+        y = arr[:, -1]
+        out = np.full(arr.shape[1] - 1, np.nan)
+        for j in range(arr.shape[1] - 1):
+            ok = ~np.isnan(arr[:, j]) & ~np.isnan(y)
+            if ok.sum() >= 2:
+                out[j] = np.corrcoef(arr[ok, j], y[ok])[0, 1]
+        return out
+
+
 def render_visual_2A_correlation_heatmap(
     era5_df: pd.DataFrame, storms_v3_df: pd.DataFrame, storms_v4_df: pd.DataFrame
 ) -> None:
@@ -277,7 +331,7 @@ def render_visual_2A_correlation_heatmap(
         key="vis2_metric",
     )
 
-    climate_vars = [v for v in CLIMATE_VARS_9 if v in era5_df.columns]
+    climate_vars = _available_climate_vars(tuple(era5_df.columns))
     if not climate_vars:
         st.error("None of the 9 climate variables are present in ERA5 dataframe.")
         st.stop()
@@ -300,25 +354,31 @@ def render_visual_2A_correlation_heatmap(
         value=(min_year, max_year),
         key=f"vis2_year_range_{mode}",
     )
-    merged = merged[(merged["year"] >= year_range[0]) & (merged["year"] <= year_range[1])]
+    # merged is year-sorted (see merge_climate_and_storm_metrics): two binary searches + a
+    # positional slice instead of two full boolean masks on every slider tick
+    years = merged["year"].to_numpy()
+    lo = np.searchsorted(years, year_range[0], side="left")
+    hi = np.searchsorted(years, year_range[1], side="right")
+    merged = merged.iloc[lo:hi]
 
     # Correlations (one row: storm_metric vs all climate vars)
-    corrs = []
-    for v in climate_vars:
-        x = merged[v]
-        y = merged[storm_metric]
-
-        if x.notna().sum() < 3 or y.notna().sum() < 3:
-            corrs.append(np.nan)
-            continue
-        if x.nunique(dropna=True) <= 1 or y.nunique(dropna=True) <= 1:
-            corrs.append(np.nan)
-            continue
-
-        corrs.append(x.corr(y))
+    # all of them from one corrcoef over the stacked columns (metric last) instead of a Series.corr each
+    arr = merged[climate_vars + [storm_metric]].to_numpy(dtype=np.float64)
+    r = _corr_with_last(arr)
+
+    # the "too few values / constant column" guards for every column in one pass each
+    # (the metric's own stats come out of the same reductions, not re-scanned per variable):
+    # non-NaN count, and min == max over the non-NaN values (what nunique <= 1 checked)
+    ok = ~np.isnan(arr)
+    n_ok = ok.sum(axis=0)
+    constant = np.where(ok, arr, np.inf).min(axis=0) >= np.where(ok, arr, -np.inf).max(axis=0)
+    usable = (n_ok >= 3) & ~constant
+    corrs = np.where(usable[:-1] & usable[-1], r, np.nan)
 
     data = np.array([corrs])  # (1, n_vars)
 
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(max(7, len(climate_vars) * 0.9), 2.4))
     im = ax.imshow(data, aspect="auto")
 
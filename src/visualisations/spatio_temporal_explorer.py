@@ -1,110 +1,267 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
+import numpy as np
+import orjson
 import pandas as pd
 import streamlit as st
 import pydeck as pdk
 
+from core.kpis import INTENSITY_CLASSES, encode_intensity
+
+
+def _round_coords(coords: list, ndigits: int) -> list:
+    # nested geojson coordinate arrays, any depth ([lon, lat] pairs at the bottom)
+    if coords and isinstance(coords[0], (int, float)):
+        return [round(c, ndigits) for c in coords]
+    return [_round_coords(c, ndigits) for c in coords]
+
 
 @st.cache_data(show_spinner=False)
 def _load_geojson(p: Path) -> dict:
-    with open(p, "r", encoding="utf-8") as f:
-        return json.load(f)
+    gj = orjson.loads(p.read_bytes())  # orjson parses straight from the bytes, quicker than json.load
+
+    # the outline is already simplified offline (simplify_tolerance_degrees in its properties);
+    # what's left is 17-digit vertices like 120.86068769600001 going to the browser every rerun.
+    # 5 dp (~1 m) is far below what the map can show and roughly halves the layer json
+    for feat in gj.get("features", []):
+        geom = feat.get("geometry") or {}
+        if "coordinates" in geom:
+            geom["coordinates"] = _round_coords(geom["coordinates"], 5)
+    return gj
+
+
+@st.cache_resource(show_spinner=False)
+def _outline_layer(p: Path, layer_id: str, line_color: tuple[int, int, int, int]) -> pdk.Layer:
+    # static outline layers (PH / PAR) built once per file and handed back as the same object every
+    # rerun; the fixed id lets deck.gl match it to the layer it already has and keep its buffers
+    # instead of treating it as a new layer and re-tessellating the outline
+    return pdk.Layer(
+        "GeoJsonLayer",
+        data=_load_geojson(p),
+        id=layer_id,
+        stroked=True,
+        filled=False,
+        get_line_color=list(line_color),
+        line_width_min_pixels=1,
+        pickable=False,
+    )
 
-@st.cache_data(show_spinner=False)
-def _heatmap_points(tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool) -> pd.DataFrame:
-    sids = set(storms_df["SID"].unique().tolist())
-    t = tracks_df[tracks_df["SID"].isin(sids)].copy()
 
-    # optional land-only
-    if land_only_flag and "on_ph_land" in t.columns:
-        t = t[t["on_ph_land"]]
+def _track_mask(tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool) -> np.ndarray:
+    # rows of the filtered storms (+ optional land-only) as one numpy mask; the helpers below then
+    # pull just their columns with a single .loc, no full-frame .copy() of the filtered tracks
+    sid = tracks_df["SID"]
+    if isinstance(sid.dtype, pd.CategoricalDtype):
+        # categorical SIDs (load_tracks reads them dictionary-encoded): look the wanted SIDs up in the
+        # categories once, then the row filter is an integer isin on the codes, no string hashing
+        wanted = sid.cat.categories.get_indexer(storms_df["SID"].unique())
+        mask = np.isin(sid.cat.codes.to_numpy(), wanted[wanted >= 0])
+    else:
+        mask = sid.isin(storms_df["SID"].unique()).to_numpy()
+    if land_only_flag and "on_ph_land" in tracks_df.columns:
+        mask &= tracks_df["on_ph_land"].to_numpy(dtype=bool)
+    return mask
 
-    if t.empty:
-        return pd.DataFrame()
 
-    # lon for plotting
-    if "LON_PLOT" not in t.columns:
-        if "LON_180" in t.columns:
-            t["LON_PLOT"] = t["LON_180"]
-        else:
-            t["LON_PLOT"] = t["LON"]
+def _lon_column(tracks_df: pd.DataFrame) -> str:
+    # lon for plotting: LON_PLOT from the loader, else LON_180 (cleaner map continuity), else LON
+    return next(c for c in ("LON_PLOT", "LON_180", "LON") if c in tracks_df.columns)
+
+
+# per-selection results: bounded, so clicking through year / intensity combinations doesn't grow
+# the cache for the life of the server process
+_SELECTION_CACHE_ENTRIES = 32
+
+
+@st.cache_data(show_spinner=False, max_entries=_SELECTION_CACHE_ENTRIES)
+def _heatmap_points(tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool) -> pd.DataFrame:
+    # keep small, avoid dragging 100k+ rows into the deck (the heatmap never reads SID, so it stays out)
+    lon_col = _lon_column(tracks_df)
+    cols = ["LAT", lon_col] + (["USA_WIND"] if "USA_WIND" in tracks_df.columns else [])
+    t = tracks_df.loc[_track_mask(tracks_df, storms_df, land_only_flag), cols].rename(columns={lon_col: "LON_PLOT"})
 
     t = t.dropna(subset=["LAT", "LON_PLOT"])
+    if t.empty:
+        return pd.DataFrame()
 
-    # keep small, avoid dragging 100k+ rows into the deck
-    keep = ["SID", "LAT", "LON_PLOT", "USA_WIND"]
-    keep = [c for c in keep if c in t.columns]
-    t = t[keep].copy()
+    # pydeck writes the layer data out as json, so what the browser gets is the decimal repr:
+    # float32 coords come out as 15.300000190734863, rounded float64 as 15.3 (5 dp is ~1 m)
+    t[["LAT", "LON_PLOT"]] = t[["LAT", "LON_PLOT"]].astype(np.float64).round(5)
+    if "USA_WIND" in t.columns:
+        t["USA_WIND"] = pd.to_numeric(t["USA_WIND"], errors="coerce", downcast="float")
 
     return t
 
-@st.cache_data(show_spinner=False)
-def _build_paths(tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool) -> pd.DataFrame:
-    # SID list from storm filter
-    sids = set(storms_df["SID"].unique().tolist())
-    t = tracks_df[tracks_df["SID"].isin(sids)].copy()
+def _in_track_order(t: pd.DataFrame) -> bool:
+    # already in (SID, ISO_TIME) order? one vectorised pass over neighbouring rows
+    # (categorical SIDs compare on their codes, which is the order sort_values would give them)
+    sid = t["SID"]
+    keys = sid.cat.codes.to_numpy() if isinstance(sid.dtype, pd.CategoricalDtype) else sid.to_numpy()
+    if len(keys) < 2:
+        return True
+    time = t["ISO_TIME"].to_numpy()
+    return bool(np.all((keys[1:] > keys[:-1]) | ((keys[1:] == keys[:-1]) & (time[1:] >= time[:-1]))))
+
+
+@st.cache_resource(show_spinner=False)
+def _track_index(tracks_df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    Sorted, path-ready view of all the tracks, built once (load_tracks hands over the same full table
+    every rerun) and shared by every _build_paths call: a new year / intensity / land-only selection
+    is just a different set of slices out of it, no re-sort or regroup:
+    - sids / starts / ends: one contiguous run of rows per storm, in (SID, ISO_TIME) order
+    - coords: (lon, lat) rows, rounded to 5 dp so the path json carries 15.3, not float32's 15.300000190734863
+    - land: on_ph_land per row (all True if the column is missing, so land-only is a no-op)
+    """
+    lon_col = _lon_column(tracks_df)
+    cols = ["SID", "ISO_TIME", lon_col, "LAT"] + (["on_ph_land"] if "on_ph_land" in tracks_df.columns else [])
+    t = tracks_df[cols].dropna(subset=["LAT", lon_col])
+    # load_tracks hands the rows over pre-sorted; only sort if a caller didn't
+    if not _in_track_order(t):
+        t = t.sort_values(["SID", "ISO_TIME"])
+
+    sid_arr = t["SID"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, sid_arr[1:] != sid_arr[:-1]]) if len(sid_arr) else np.array([], dtype=np.int64)
+    return {
+        "sids": sid_arr[starts],
+        "starts": starts,
+        "ends": np.r_[starts[1:], len(sid_arr)],
+        "coords": t[[lon_col, "LAT"]].to_numpy(dtype=np.float64).round(5),
+        "land": t["on_ph_land"].to_numpy(dtype=bool) if "on_ph_land" in t.columns else np.ones(len(t), dtype=bool),
+    }
 
-    # only land points (v4 has on_ph_land)
-    if land_only_flag and "on_ph_land" in t.columns:
-        t = t[t["on_ph_land"]]
 
-    # plotting lon
-    if "LON_PLOT" not in t.columns:
-        t["LON_PLOT"] = t["LON"]
+@st.cache_data(show_spinner=False, max_entries=_SELECTION_CACHE_ENTRIES)
+def _path_arrays(
+    tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # what gets cached is three flat arrays (sids, all path positions back to back, offsets into them),
+    # not a frame with a list-of-floats cell per storm, so a cache write / read is a few buffer copies
+    # instead of pickling every coordinate as its own python float
+    # no sort / dropna here: the selected storms' runs are sliced straight out of the cached index,
+    # so the work is one slice per selected storm (plus the land mask on it, for land-only)
+    idx = _track_index(tracks_df)
+    coords, land = idx["coords"], idx["land"]
+    selected = np.flatnonzero(np.isin(idx["sids"], storms_df["SID"].unique()))
+
+    keep, pieces = [], []
+    for i in selected:
+        s, e = idx["starts"][i], idx["ends"][i]
+        pts = coords[s:e][land[s:e]] if land_only_flag else coords[s:e]
+        # tiny paths (< 2 points) can't be drawn
+        if len(pts) >= 2:
+            keep.append(i)
+            pieces.append(pts.ravel())
+
+    offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in pieces], out=offsets[1:])
+    positions = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.float64)
+    return idx["sids"][keep], positions, offsets
 
-    t = t.dropna(subset=["LAT", "LON_PLOT"])
-    t = t.sort_values(["SID", "ISO_TIME"])
 
-    # stable path build (no groupby.apply edge cases)
-    paths_series = t.groupby("SID")[["LON_PLOT", "LAT"]].apply(lambda g: g.values.tolist())
-    paths = paths_series.reset_index().rename(columns={0: "path"})
+def _build_paths(tracks_df: pd.DataFrame, storms_df: pd.DataFrame, land_only_flag: bool) -> pd.DataFrame:
+    sids, positions, offsets = _path_arrays(tracks_df, storms_df, land_only_flag)
+
+    # flat [lon0, lat0, lon1, lat1, ...] per storm (PathLayer position_format="XY"): no nested
+    # per-vertex list for python to build or for deck.gl to unpack
+    path_list = [positions[s:e].tolist() for s, e in zip(offsets[:-1], offsets[1:])]
+    paths = pd.DataFrame({"SID": pd.Series(sids, dtype=object), "path": pd.Series(path_list, dtype=object)})
 
     # tooltip meta
     keep = ["SID", "start_year", "peak_intensity", "max_wind", "n_track_points", "par_max_wind", "par_peak_intensity"]
     keep = [c for c in keep if c in storms_df.columns]
     paths = paths.merge(storms_df[keep], on="SID", how="left")
 
-    # drop tiny paths
-    paths = paths[paths["path"].map(lambda x: isinstance(x, list) and len(x) >= 2)].copy()
-
     return paths
 
-def _intensity_rgba(label: str) -> list[int]:
-    return {
-        "TD": [120, 120, 120, 220],
-        "TS": [70, 130, 180, 220],
-        "TY": [255, 165, 0, 220],
-        "STY": [220, 20, 60, 230],
-    }.get(label, [100, 100, 100, 200])
+# TD/TS/TY/STY colours in INTENSITY_CLASSES order, plus the fallback for anything else as the last
+# row: encode_intensity's -1 for unknown labels indexes straight into it
+_INTENSITY_RGBA = np.array([
+    [120, 120, 120, 220],  # TD
+    [70, 130, 180, 220],   # TS
+    [255, 165, 0, 220],    # TY
+    [220, 20, 60, 230],    # STY
+    [100, 100, 100, 200],  # unknown / missing
+])
+
+
+# max-wind grayscale ramp as a table: row k is grey level 60 + k (60 = weakest .. 240 = strongest),
+# so the per-track colour is one row lookup instead of stacking four columns per call
+_WIND_RGBA = np.array([[60 + k, 60 + k, 60 + k, 160] for k in range(181)])
+
+
+def _intensity_colors(labels: pd.Series) -> list[list[int]]:
+    # one table lookup on the int8 class codes instead of a python call per row
+    return _INTENSITY_RGBA[encode_intensity(labels)].tolist()
+
+
+@st.cache_data(show_spinner=False, max_entries=_SELECTION_CACHE_ENTRIES)
+def _track_colors(values: tuple, mode: str) -> list[list[int]]:
+    # keyed on the plain column values (labels or winds) + colour mode, so reruns that don't change
+    # the selection or the colour mode get the colour list straight back from the cache
+    if mode in ("Landfall intensity", "PAR peak intensity"):
+        return _intensity_colors(pd.Series(values, dtype=object))
+
+    # max wind grayscale ramp, computed on the whole column at once
+    w = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").fillna(0.0)
+    w_min = float(w.min())
+    w_max = float(w.max() if w.max() > w.min() else w.min() + 1.0)
+
+    g = (60 + 180 * (w.to_numpy(dtype=np.float64) - w_min) / (w_max - w_min)).astype(np.int64)
+    return _WIND_RGBA[g - 60].tolist()
+
 
 def _add_color(df: pd.DataFrame, mode: str) -> pd.DataFrame:
     out = df.copy()
 
     if mode == "Landfall intensity":
-        out["color"] = out["peak_intensity"].map(_intensity_rgba)
+        out["color"] = _track_colors(tuple(out["peak_intensity"]), mode)
         return out
 
     if mode == "PAR peak intensity":
         if "par_peak_intensity" in out.columns:
-            out["color"] = out["par_peak_intensity"].fillna("UNK").map(_intensity_rgba)
+            out["color"] = _track_colors(tuple(out["par_peak_intensity"]), mode)
         else:
             out["color"] = [[100, 100, 100, 120]] * len(out)
         return out
 
-    # max wind grayscale ramp
-    w = pd.to_numeric(out.get("max_wind", 0), errors="coerce").fillna(0.0)
-    w_min = float(w.min())
-    w_max = float(w.max() if w.max() > w.min() else w.min() + 1.0)
+    winds = tuple(out["max_wind"]) if "max_wind" in out.columns else (0.0,) * len(out)
+    out["color"] = _track_colors(winds, mode)
+    return out
 
-    def wind_rgba(v: float) -> list[int]:
-        t = (v - w_min) / (w_max - w_min)
-        g = int(60 + 180 * t)
-        return [g, g, g, 160]
 
-    out["color"] = w.map(wind_rgba)
-    return out
+def _storm_mask(storms_df: pd.DataFrame, year_min: int, year_max: int, intensities: list[str]) -> np.ndarray:
+    # sidebar filter as one numpy mask: year bounds on the raw year array, and the intensity pick
+    # as an int isin on the categorical codes (string isin only if the labels aren't categorical)
+    years = storms_df["start_year"].to_numpy()
+    labels = storms_df["peak_intensity"]
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        wanted = labels.cat.categories.get_indexer(intensities)
+        picked = np.isin(labels.cat.codes.to_numpy(), wanted[wanted >= 0])
+    else:
+        picked = labels.isin(intensities).to_numpy()
+    return (years >= year_min) & (years <= year_max) & picked
+
+
+def _storm_table(storms_f: pd.DataFrame, cols: list[str], n: int = 300) -> pd.DataFrame:
+    # first n storms by (year, strongest first). only rows up to the n-th smallest year can make the
+    # cut, so a partition on the year array trims to those before the sort (boundary-year ties stay in,
+    # original order kept, so the result is the same as sorting everything and taking the head)
+    years = storms_f["start_year"].to_numpy()
+    if len(years) > n:
+        storms_f = storms_f[years <= np.partition(years, n - 1)[n - 1]]
+    return storms_f.sort_values(["start_year", "max_wind"], ascending=[True, False])[cols].head(n)
+
+
+@st.cache_data(show_spinner=False)
+def _filter_options(storms_df: pd.DataFrame) -> tuple[int, int, list[str]]:
+    # sidebar year bounds + the intensity classes actually present (TD/TS/TY/STY order),
+    # worked out once per storms table instead of on every widget tick
+    years = storms_df["start_year"]
+    present = set(storms_df["peak_intensity"].dropna().unique())
+    intensity_opts = [x for x in INTENSITY_CLASSES if x in present] or sorted(present)
+    return int(years.min()), int(years.max()), intensity_opts
 
 
 def render_spatio_temporal_explorer(
@@ -121,19 +278,18 @@ def render_spatio_temporal_explorer(
         st.error("Missing philippines.geojson")
         st.stop()
 
-    ph = _load_geojson(ph_geojson)
+    ph_layer = _outline_layer(ph_geojson, "ph-static", (0, 0, 0, 140))
 
-    par = None
+    par_layer = None
     if par_geojson is not None and par_geojson.exists():
-        par = _load_geojson(par_geojson)
+        par_layer = _outline_layer(par_geojson, "par-static", (30, 30, 30, 130))
 
     # sidebar
     with st.sidebar:
         st.header("Filters")
 
-        # time + intensity
-        y0 = int(storms_df["start_year"].min())
-        y1 = int(storms_df["start_year"].max())
+        # time + intensity (bounds / options don't change with the filters, so they come from the cache)
+        y0, y1, intensity_opts = _filter_options(storms_df)
 
         default_start = max(y0, 2013)
         default_end = min(y1, 2017)
@@ -146,9 +302,6 @@ def render_spatio_temporal_explorer(
         )
 
 
-        base = ["TD", "TS", "TY", "STY"]
-        present = set(storms_df["peak_intensity"].dropna().unique())
-        intensity_opts = [x for x in base if x in present] or sorted(present)
         default_ints = ["STY"] if "STY" in intensity_opts else intensity_opts
 
         intensities = st.multiselect(
@@ -193,10 +346,7 @@ def render_spatio_temporal_explorer(
         )
 
     # storm filter
-    storms_f = storms_df[
-        storms_df["start_year"].between(year_min, year_max)
-        & storms_df["peak_intensity"].isin(intensities)
-    ].copy()
+    storms_f = storms_df.iloc[_storm_mask(storms_df, year_min, year_max, intensities)]
 
     if storms_f.empty:
         st.warning("No storms match the selected filters.")
@@ -210,10 +360,14 @@ def render_spatio_temporal_explorer(
             st.warning("No points available for heatmap.")
             st.stop()
 
+        # the layer only reads position + weight, so that's all that goes into its data: density mode
+        # sends no weight column at all (constant get_weight), wind-weighted sends the winds as it
         if heat_weight == "Wind-weighted" and "USA_WIND" in pts.columns:
-            pts["weight"] = pd.to_numeric(pts["USA_WIND"], errors="coerce").fillna(0.0)
+            heat_data = pd.DataFrame({"LON_PLOT": pts["LON_PLOT"], "LAT": pts["LAT"], "weight": pts["USA_WIND"].fillna(0.0)})
+            get_weight = "weight"
         else:
-            pts["weight"] = 1.0
+            heat_data = pts[["LON_PLOT", "LAT"]]
+            get_weight = 1
 
     elif map_mode == "Tracks (selected only)":
         paths = _build_paths(tracks_df, storms_f, land_only)
@@ -224,23 +378,11 @@ def render_spatio_temporal_explorer(
 
         paths = _add_color(paths, color_mode)
 
-        a, b = st.columns(2)
-        with a:
-            st.metric("Storms", f"{storms_f['SID'].nunique():,}")
-        with b:
-            st.metric("Rendered tracks", f"{len(paths):,}")
-
     else:
         st.info("Landfall points mode not wired yet. Switch to Heatmap or Tracks for now.")
         st.stop()
 
-
-
-    # build paths (always)
-    paths = _build_paths(tracks_df, storms_f, land_only)
-
-    paths = _add_color(paths, color_mode)
-
+    # paths only exist (and only get built) in tracks mode; one metrics row for whichever mode is on
     a, b = st.columns(2)
 
     if map_mode == "Heatmap":
@@ -255,44 +397,23 @@ def render_spatio_temporal_explorer(
         with b:
             st.metric("Rendered tracks", f"{len(paths):,}")
 
-    # layers (fresh each run)
-    layers: list[pdk.Layer] = []
-
-    # PH outline first
-    layers.append(
-        pdk.Layer(
-            "GeoJsonLayer",
-            data=ph,
-            stroked=True,
-            filled=False,
-            get_line_color=[0, 0, 0, 140],
-            line_width_min_pixels=1,
-            pickable=False,
-        )
-    )
-
-    # optional PAR outline
-    if par is not None:
-        layers.append(
-            pdk.Layer(
-                "GeoJsonLayer",
-                data=par,
-                stroked=True,
-                filled=False,
-                get_line_color=[30, 30, 30, 130],
-                line_width_min_pixels=1,
-                pickable=False,
-            )
-        )
+    # layers: the outlines are the cached static ones, only the data layer is new each run.
+    # it gets a fixed id too (pydeck would give it a fresh uuid every rerun), so the deck json is
+    # identical when nothing changed and deck.gl updates the existing layer instead of rebuilding it
+    # PH outline first, then the optional PAR outline
+    layers: list[pdk.Layer] = [ph_layer]
+    if par_layer is not None:
+        layers.append(par_layer)
 
     # ONLY ONE of these gets added
     if map_mode == "Heatmap":
         layers.append(
             pdk.Layer(
                 "HeatmapLayer",
-                data=pts,
+                data=heat_data,
+                id="storm-heatmap",
                 get_position=["LON_PLOT", "LAT"],
-                get_weight="weight",
+                get_weight=get_weight,
                 radius_pixels=35,
                 intensity=1.2,
                 threshold=0.05,
@@ -305,7 +426,11 @@ def render_spatio_temporal_explorer(
             pdk.Layer(
                 "PathLayer",
                 data=paths,
+                id="storm-tracks",
                 get_path="path",
+                # paths are flat lon/lat arrays (see _build_paths); types.String so pydeck sends
+                # the literal "XY" instead of treating it as an accessor expression
+                position_format=pdk.types.String("XY"),
                 get_color="color",
                 get_width=3,
                 width_scale=1,
@@ -363,7 +488,7 @@ def render_spatio_temporal_explorer(
         st.subheader("Storms (filtered)")
         cols = [c for c in ["SID", "start_year", "peak_intensity", "max_wind", "n_track_points"] if c in storms_f.columns]
         st.dataframe(
-            storms_f.sort_values(["start_year", "max_wind"], ascending=[True, False])[cols].head(300),
+            _storm_table(storms_f, cols),
             height=650,
             use_container_width=True,
         )